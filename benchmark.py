@@ -0,0 +1,140 @@
+import argparse
+import json
+import math
+import time
+from typing import List, Dict
+
+import pygame
+
+from data.constants import Constants
+from engine.engine import Engine
+from engine.input import Input
+from engine.tween.tweensubject import TweenSubject
+
+# Default input sequence : walk around the spawn position
+# each step holds the given keys for the given number of frames
+# and sends a KEYDOWN event for each key of "events" on its first frame
+DEFAULT_INPUTS = [
+    {"frames": 60, "keys": ["RIGHT"]},
+    {"frames": 60, "keys": ["DOWN"]},
+    {"frames": 60, "keys": ["LEFT"]},
+    {"frames": 60, "keys": ["UP"]},
+    {"frames": 30, "keys": []}
+]
+
+
+def keyCode(name : str) -> int:
+    return getattr(pygame, "K_" + name)
+
+
+def percentiles(values : List[float]) -> Dict:
+    values = sorted(values)
+
+    def percentile(p):
+        return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+    return {
+        "mean": sum(values) / len(values),
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p95": percentile(95),
+        "p99": percentile(99),
+        "max": values[-1]
+    }
+
+
+def run(mapName : str, spawnPosition : tuple, framesCount : int, dt : float, inputs : List[Dict], configuration : str, replay : str = None) -> Dict:
+    Engine.SHOW_PERF_HUD = False
+
+    # a recording replaces the scripted inputs, its dt and its length
+    if replay is not None:
+        Input.startReplay(replay)
+        framesCount = Input.getReplayLength()
+
+    engine = Engine(configuration, Constants.GAME_VARIANT_FLAMIFLETTE, True)
+
+    from engine.scene.map.mapscene import MapScene
+    scene = MapScene(engine, mapName, spawnPosition)
+
+    start = time.perf_counter()
+    engine.pushScene(scene, None)
+    loadTime = (time.perf_counter() - start) * 1000
+
+    TweenSubject.interpolation = 1.0
+
+    frameTimes = []
+    updateTimes = []
+    drawTimes = []
+
+    step = 0
+    stepFrame = 0
+
+    for frame in range(framesCount):
+        events = []
+
+        # Scripted inputs, looping over the steps
+        if replay is None:
+            currentStep = inputs[step]
+            Input.setScriptedKeys([keyCode(k) for k in currentStep.get("keys", [])])
+
+            if stepFrame == 0:
+                events = [pygame.event.Event(pygame.KEYDOWN, key=keyCode(k)) for k in currentStep.get("events", [])]
+
+            stepFrame += 1
+            if stepFrame >= currentStep["frames"]:
+                stepFrame = 0
+                step = (step + 1) % len(inputs)
+
+        # Frame
+        frameStart = time.perf_counter()
+        engine.update(dt, events)
+        engine.updateLoading()
+        updateEnd = time.perf_counter()
+        engine.present(dt)
+        frameEnd = time.perf_counter()
+
+        updateTimes.append((updateEnd - frameStart) * 1000)
+        drawTimes.append((frameEnd - updateEnd) * 1000)
+        frameTimes.append((frameEnd - frameStart) * 1000)
+
+    Input.setScriptedKeys(None)
+    engine.popScene(None)
+    pygame.quit()
+
+    return {
+        "map": mapName,
+        "configuration": configuration,
+        "frames": framesCount,
+        "dt": dt if replay is None else None,
+        "replay": replay,
+        "loadTime": loadTime,
+        "frameTime": percentiles(frameTimes),
+        "update": percentiles(updateTimes),
+        "draw": percentiles(drawTimes)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Runs a map headlessly with scripted inputs and reports frame times")
+    parser.add_argument("map", help="name of the map to load")
+    parser.add_argument("--spawn", type=int, nargs=2, default=(10, 10), help="spawn position of the character in tiles")
+    parser.add_argument("--frames", type=int, default=600, help="number of frames to run")
+    parser.add_argument("--dt", type=float, default=1000 / 60, help="fixed delta-time of each frame in ms")
+    parser.add_argument("--inputs", help="JSON file of the input steps (defaults to walking around)")
+    parser.add_argument("--replay", help="recorded inputs file to replay instead of the scripted inputs")
+    parser.add_argument("--configuration", default=Constants.DEFAULT_CONFIGURATION, help="engine configuration")
+    parser.add_argument("--output", help="JSON file to write the results to (defaults to stdout)")
+    args = parser.parse_args()
+
+    inputs = DEFAULT_INPUTS
+    if args.inputs is not None:
+        with open(args.inputs, "r") as f:
+            inputs = json.loads(f.read())
+
+    results = run(args.map, tuple(args.spawn), args.frames, args.dt, inputs, args.configuration, args.replay)
+
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            f.write(json.dumps(results, indent=2))
+    else:
+        print(json.dumps(results, indent=2))
@@ -18,6 +18,9 @@ class Constants:
     SFX_PATH = os.path.join("data", "sfx")
     FONTS_PATH = os.path.join("data", "fonts")
 
+    ATLAS_PATH = os.path.join("data", "atlas")
+    PIXEL_CACHE_PATH = os.path.join("data", "cache", "pixels")
+    COMPILED_MAPS_PATH = os.path.join("data", "cache", "maps")
     COLOR_KEYS_PATH = os.path.join("data", "colorkeys.json")
     STRINGS_PATH = os.path.join("data", "strings")
 
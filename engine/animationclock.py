@@ -0,0 +1,19 @@
+class AnimationClock:
+    '''
+    Time shared by all the looping animations (animated tiles...), advanced by the engine each update
+    Animations read their current frame from it instead of running their own timers
+    '''
+
+    __time = 0  # in ms
+
+    @staticmethod
+    def update(dt : int):
+        AnimationClock.__time += dt
+
+    @staticmethod
+    def getTime() -> int:
+        return AnimationClock.__time
+
+    @staticmethod
+    def reset():
+        AnimationClock.__time = 0
@@ -0,0 +1,97 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any
+
+
+class AssetLoader:
+    '''
+    Loads a batch of assets : files are read and decoded on a thread pool,
+    then the finishing steps that must run on the main thread (display conversion...) are run in a batch
+    The decoding can be done ahead of time by a worker thread, see decode() and finish()
+    '''
+
+    WORKERS = 4  # number of threads reading and decoding files
+    REPORT_ASSETS = False  # print the time spent on each asset, not only the total
+
+    def __init__(self, name : str):
+        self.__name = name  # name of the batch, for the report
+        self.__jobs = []  # [asset name, decode function, finish function]
+        self.__decoded = []  # (decoded value, decode time in ms) of each job, once decoded
+        self.__decodeTime = 0  # time spent decoding the batch in ms
+
+    '''
+    Adds an asset to the batch
+    decode() is run on a worker thread, finish(decoded value) on the main thread once every asset is decoded
+    finish may be None if the decoded value is only needed in the results of run()
+    '''
+    def add(self, assetName : str, decode : Callable, finish : Callable = None):
+        self.__jobs.append((assetName, decode, finish))
+
+    def hasAsset(self, assetName : str) -> bool:
+        return any(name == assetName for name, _, _ in self.__jobs)
+
+    '''
+    Adds a JSON file to the batch, finish is called with the parsed data
+    '''
+    def addJson(self, assetName : str, path : str, finish : Callable = None):
+        def decode():
+            with open(path, "r", encoding="utf-8") as f:
+                return json.loads(f.read())
+
+        self.add(assetName, decode, finish)
+
+    '''
+    Loads the batch and returns the decoded values by asset name
+    Exceptions raised while decoding are raised again on the main thread
+    '''
+    def run(self) -> Dict[str, Any]:
+        self.decode()
+        return self.finish()
+
+    '''
+    Decodes the batch in parallel and returns the decoded values by asset name
+    Can be called from a worker thread, finish() must then be called on the main thread
+    '''
+    def decode(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+
+        def timedDecode(decode):
+            decodeStart = time.perf_counter()
+            value = decode()
+            return value, (time.perf_counter() - decodeStart) * 1000
+
+        with ThreadPoolExecutor(max_workers=AssetLoader.WORKERS) as executor:
+            futures = [executor.submit(timedDecode, decode) for _, decode, _ in self.__jobs]
+
+        self.__decoded = [future.result() for future in futures]
+        self.__decodeTime = (time.perf_counter() - start) * 1000
+
+        return {assetName: value for (assetName, _, _), (value, _) in zip(self.__jobs, self.__decoded)}
+
+    '''
+    Runs the finishing steps of the decoded batch on the main thread
+    '''
+    def finish(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+
+        results = {}
+        for (assetName, _, finish), (value, decodeTime) in zip(self.__jobs, self.__decoded):
+            finishStart = time.perf_counter()
+            if finish is not None:
+                finish(value)
+            finishTime = (time.perf_counter() - finishStart) * 1000
+
+            results[assetName] = value
+
+            if AssetLoader.REPORT_ASSETS:
+                print("          " + assetName + " : decoded in %.2f ms, finished in %.2f ms" % (decodeTime, finishTime))
+
+        finishTime = (time.perf_counter() - start) * 1000
+
+        print("     Loaded %d %s assets in %.2f ms (decoding %.2f ms, finishing %.2f ms)" % (len(self.__jobs), self.__name, self.__decodeTime + finishTime, self.__decodeTime, finishTime))
+
+        self.__jobs = []
+        self.__decoded = []
+
+        return results
@@ -1,25 +1,52 @@
 import os
-from typing import Tuple, List
+import time
+from typing import Tuple, List, Iterator
 
 import pygame
 
+from engine.animationclock import AnimationClock
+from engine.assetloader import AssetLoader
 from engine.graphics.fontmanager import FontManager
+from engine.input import Input
+from engine.profiler import Profiler
 from engine.scene.scene import Scene
+from engine.sound.bgm import BGM
 from engine.sound.sfx import SFX
 from engine.strings import Strings
+from engine.tween.tweensubject import TweenSubject
 
 
 class Engine:
 
     TRANSITION_ACTION_PUSH = 0
     TRANSITION_ACTION_POP = 1
+    TRANSITION_ACTION_LOAD = 2  # the transition is over, the pending scene is pushed once loaded
 
     GAME_VARIANT_1 = 0
     GAME_VARIANT_2 = 1
 
-    SHOW_FPS_COUNTER = True
+    SHOW_PERF_HUD = True  # is the performance HUD shown when the game starts ?
+    PERF_HUD_KEY = pygame.K_F3  # toggles the performance HUD
+    DIRTY_RECTS_RENDERING = False  # if True, only the screen rects reported by the scenes are cleared, redrawn and pushed
+    LOOP_MODE_VARIABLE = 0  # one update per frame with the measured dt, frames paced by a busy loop
+    LOOP_MODE_FIXED = 1  # updates at a fixed tick rate, frames interpolated between ticks and paced by sleeping
 
-    def __init__(self, configuration : Tuple, variant : int):
+    LOOP_MODE = LOOP_MODE_FIXED
+    TICK_RATE = 60  # simulation ticks per second in LOOP_MODE_FIXED, the framerate comes from the configuration
+    MAX_TICKS_PER_FRAME = 5  # simulation time beyond this is dropped when the game runs too late
+    SPIN_DURATION = 1  # ms busy waited at the end of each frame in LOOP_MODE_FIXED for accuracy, 0 to only sleep
+
+    MAX_FRAMES_SKIPPED = 0  # how many frames in a row can skip drawing when the game runs late, 0 to never skip
+
+    LOADING_BUDGET = 8  # ms spent each frame loading the scene pushed with a transition, the transition keeps running meanwhile
+
+    PRELOADED_TEXTURES = ["gui.frame", "gui.caret"]  # textures loaded at startup, the others are loaded on first use
+
+    PROFILER_KEY = pygame.K_F4  # starts or stops a cProfile capture
+    PROFILER_CAPTURE_FRAMES = 300  # frames window of a capture
+    PROFILER_CAPTURE_START = None  # frame at which a capture automatically starts, None to only start it with the key
+
+    def __init__(self, configuration : Tuple, variant : int, headless : bool = False):
         # data init
         from data.constants import Constants
         if configuration not in Constants.CONFIGURATIONS:
@@ -30,13 +57,27 @@ class Engine:
         self.__sceneStack = []  # scene stack
         self.__sceneDrawOrder = []  # pre-computed list of scenes to draw in the right order
         self.__pendingScene = None  # the scene to push after a transition
+        self.__pendingLoad = None  # loading steps of the pending scene, None once it is loaded
+        self.__preloads = {}  # scene -> its remaining loading steps, None once it is loaded, for the scenes loaded in the background before replacing the current one
         self.__transitionScene = None  # the current transition
-        self.__transitionAction = None  # what should we do after the transition ? TRANSITION_ACTION_PUSH or TRANSITION_ACTION_POP
+        self.__transitionAction = None  # what should we do after the transition ? TRANSITION_ACTION_PUSH, TRANSITION_ACTION_POP or TRANSITION_ACTION_LOAD
         self.__clock = pygame.time.Clock()  # the main loop clock
         self.__running = True  # is the game running ?
         self.__framerate = configuration[0]  # the framerate in FPS
         self.__resolution = configuration[1]  # the game window resolution
         self.__variant = variant  # the game variant : GAME_VARIANT_1 or GAME_VARIANT_2
+        self.__renderingEnabled = True  # are the scenes drawn ? (disabled for headless runs)
+        self.__framesSkipped = 0  # number of frames in a row that skipped drawing
+        self.__fullRedraw = True  # should the next frame be fully redrawn, even when rendering with dirty rects ?
+        self.__perfHud = None  # the performance HUD
+        self.__scenesTimes = {}  # scene -> [update time, draw time] in ms for the current frame, only measured if the HUD is visible
+        self.__presentTime = 0  # time spent pushing the last frame to the display in ms
+        self.__framesCount = 0  # number of frames presented since the start
+
+        # headless : no window and no sound device, used for benchmarks
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
 
         # pygame display
         pygame.mixer.pre_init(44100, -16, 1, 512)
@@ -45,18 +86,33 @@ class Engine:
         pygame.display.set_caption(Constants.WINDOW_TITLE[self.__variant])
         self.__window = pygame.display.set_mode(self.__resolution, configuration[2])
 
-        # textures loading
+        # assets loading : files are read and decoded in parallel, then converted on the main thread
+        loader = AssetLoader("engine")
+
+        # textures indexing, only the ones used everywhere are loaded now
         from engine.graphics.textures import Textures
         Textures.load()
+        Textures.preload(Engine.PRELOADED_TEXTURES, loader)
 
-        # sfx loading
+        # sfx indexing, they are decoded by the scenes using them
         SFX.load()
 
+        # bgm worker
+        BGM.load()
+
         # strings loading
         Strings.load(self)
 
         # fonts
-        FontManager.load()
+        FontManager.load(loader)
+
+        loader.run()
+
+        # performance HUD
+        from engine.graphics.perfhud import PerfHUD
+        self.__perfHud = PerfHUD(self.__window, self.__framerate)
+        if not Engine.SHOW_PERF_HUD:
+            self.__perfHud.toggle()
 
     def invalidateDrawOrder(self):
         if len(self.__sceneStack) > 0:
@@ -70,6 +126,11 @@ class Engine:
         else:
             self.__sceneDrawOrder = []
 
+        self.invalidateScreen()
+
+    def invalidateScreen(self):
+        self.__fullRedraw = True
+
     def getVariant(self) -> int:
         return self.__variant
 
@@ -79,93 +140,398 @@ class Engine:
     def getWindow(self) -> pygame.Surface:
         return self.__window
 
+    def setRenderingEnabled(self, enabled : bool):
+        self.__renderingEnabled = enabled
+        self.invalidateScreen()
+
+    def isRenderingEnabled(self) -> bool:
+        return self.__renderingEnabled
+
     def getClockDate(self) -> int:
         return pygame.time.get_ticks()
 
     def playBGM(self, musicName):
-        try:
-            # TODO If already playing the same BGM, do nothing, else make a fade out and play
-            from data.constants import Constants
-            bgmPath = os.path.join(Constants.BGM_PATH, musicName + ".mp3")
-            pygame.mixer.music.load(bgmPath)
-            pygame.mixer.music.set_volume(Constants.BGM_VOLUME * Constants.MASTER_VOLUME)
-            pygame.mixer.music.play()
-        except pygame.error as e:
-            print("Unable to play BGM (" + str(e) + ")")
+        # read in the background, nothing happens if it is already the current BGM
+        BGM.play(musicName)
 
     def run(self):
         print("Running game...")
 
         # main loop
+        if Engine.LOOP_MODE == Engine.LOOP_MODE_FIXED:
+            self.runFixedTimestep()
+        else:
+            self.runVariableTimestep()
+
+        # exit
+        print("Quitting game...")
+
+        Input.stopRecording()
+
+        if Profiler.isCapturing():
+            Profiler.stopCapture()
+        elif Profiler.enabled:
+            Profiler.printReport()
+
+        for scene in self.__sceneStack[::-1]:
+            scene.unload()
+
+        # a scene still loading is dropped
+        if self.__pendingLoad is not None:
+            self.__pendingLoad.close()
+            self.__pendingLoad = None
+
+        pygame.display.quit()
+
+        from engine.graphics.textures import Textures
+        Textures.unload()
+
+        from engine.scene.map.mapcache import MapCache
+        MapCache.unload()
+
+        from engine.scene.map.tileset import Tileset
+        Tileset.unload()
+
+        AnimationClock.reset()
+
+        SFX.unload()
+        BGM.unload()
+        Strings.unload()
+        FontManager.unload()
+
+    def runVariableTimestep(self):
+        TweenSubject.interpolation = 1.0
+
         while self.__running:
 
             try:
                 # tick tock
                 dt = self.__clock.tick_busy_loop(self.__framerate)
 
-                # pygame events
-                events = pygame.event.get()
-                for event in events:
-                    if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                        self.exit()
+                # scenes update and draw
+                self.update(dt, self.processEvents())
+                self.updateLoading()
+                self.present(dt)
+            except KeyboardInterrupt:
+                self.exit()
 
-                # fill
-                self.__window.fill((0, 0, 0, 0))
+    def runFixedTimestep(self):
+        tickDuration = 1000 / Engine.TICK_RATE  # in ms
+        frameDuration = 1 / self.__framerate  # in s
 
-                # scenes update and draw
-                self.update(dt, events)
-                self.draw()
+        accumulator = 0  # simulation time to catch up with, in ms
+        pendingEvents = []  # events received since the last tick
+        lastFrameDate = time.perf_counter()
+        nextFrameDate = lastFrameDate
+
+        while self.__running:
 
-                pygame.display.update()
+            try:
+                frameDate = time.perf_counter()
+                dt = (frameDate - lastFrameDate) * 1000
+                lastFrameDate = frameDate
+
+                pendingEvents += self.processEvents()
+
+                # fixed duration updates
+                accumulator = min(accumulator + dt, tickDuration * Engine.MAX_TICKS_PER_FRAME)
+
+                while accumulator >= tickDuration:
+                    self.update(tickDuration, pendingEvents)
+                    pendingEvents = []
+                    accumulator -= tickDuration
+
+                # once per frame, however many ticks ran
+                self.updateLoading()
+
+                # draw between the last two ticks
+                TweenSubject.interpolation = accumulator / tickDuration
+                self.present(dt)
+
+                # wait for the next frame, without trying to catch up if late
+                nextFrameDate = max(nextFrameDate + frameDuration, time.perf_counter())
+                self.waitUntil(nextFrameDate)
             except KeyboardInterrupt:
                 self.exit()
 
-        # exit
-        print("Quitting game...")
+    def waitUntil(self, date : float):
+        # sleep most of the remaining time, then spin for accuracy
+        sleepDuration = date - time.perf_counter() - Engine.SPIN_DURATION / 1000
+        if sleepDuration > 0:
+            time.sleep(sleepDuration)
 
-        for scene in self.__sceneStack[::-1]:
-            scene.unload()
+        while time.perf_counter() < date:
+            pass
 
-        pygame.display.quit()
+    def processEvents(self) -> List[pygame.event.Event]:
+        events = pygame.event.get()
+        for event in events:
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                self.exit()
+            elif event.type == pygame.KEYDOWN and event.key == Engine.PERF_HUD_KEY:
+                self.__perfHud.toggle()
+                self.invalidateScreen()
+            elif event.type == pygame.KEYDOWN and event.key == Engine.PROFILER_KEY:
+                if Profiler.isCapturing():
+                    Profiler.stopCapture()
+                else:
+                    Profiler.startCapture(Engine.PROFILER_CAPTURE_FRAMES)
+
+        return events
+
+    def present(self, dt : float):
+        self.__framesCount += 1
+
+        if self.__framesCount == Engine.PROFILER_CAPTURE_START:
+            Profiler.startCapture(Engine.PROFILER_CAPTURE_FRAMES)
+        Profiler.onFrame()
+
+        if not self.shouldDraw(dt):
+            self.__scenesTimes = {}
+            return
+
+        if Engine.DIRTY_RECTS_RENDERING:
+            self.presentDirtyRects()
+        else:
+            self.__window.fill((0, 0, 0, 0))
+            self.draw()
+            self.pushDisplay(None)
 
-        from engine.graphics.textures import Textures
-        Textures.unload()
+        if self.__perfHud.isVisible():
+            self.recordPerfHudFrame(dt)
 
-        SFX.unload()
-        Strings.unload()
-        FontManager.unload()
+    def pushDisplay(self, rects : List[pygame.Rect]):
+        start = time.perf_counter()
+
+        if rects is None:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+
+        self.__presentTime = (time.perf_counter() - start) * 1000
+
+    def recordPerfHudFrame(self, dt : float):
+        scenes = self.__sceneStack
+        if self.__transitionScene is not None:
+            scenes = scenes + [self.__transitionScene]
+
+        scenesTimes = []
+        counters = {
+            "blits": 0,
+            "tweens": 0,
+            "timers": 0,
+            "interpreters": 0
+        }
+
+        for i in range(len(scenes)):
+            scene = scenes[i]
+            times = self.__scenesTimes.get(scene, (0, 0))
+            scenesTimes.append((str(i) + " " + type(scene).__name__, times[0], times[1]))
+
+            if scene in self.__scenesTimes:
+                counters["blits"] += scene.getBlitsCount()
+
+            counters["tweens"] += scene.getActiveTweensCount()
+            counters["timers"] += scene.getActiveTimersCount()
+            counters["interpreters"] += scene.getActiveInterpretersCount()
+
+        self.__perfHud.recordFrame(dt, scenesTimes, self.__presentTime, counters)
+        self.__scenesTimes = {}
 
     def exit(self):
         self.__running = False
 
     def update(self, dt : int, events : List[pygame.event.Event]):
+        if Input.isReplayFinished():
+            if self.__running:
+                print("Replay finished")
+            self.exit()
+            return
+
+        # recorded inputs replace the real ones when replaying
+        dt, events = Input.processUpdate(dt, events)
+
+        TweenSubject.currentTick += 1
+
+        AnimationClock.update(dt)
+
+        BGM.update(dt)
+
         if self.__transitionScene is None and len(self.__sceneStack) > 0:
-            self.__sceneStack[-1].update(dt, events)
+            self.updateScene(self.__sceneStack[-1], dt, events)
         elif self.__transitionScene is not None:
-            self.__transitionScene.update(dt, events)
+            self.updateScene(self.__transitionScene, dt, events)
+
+    '''
+    Runs the loading steps of the pending scene, then the ones of the preloaded scenes, until the loading budget of the frame is spent
+    Called once per frame by the main loop, not on each tick
+    '''
+    def updateLoading(self):
+        if not self.isLoadingBudgeted():
+            return
+
+        deadline = time.perf_counter() + Engine.LOADING_BUDGET / 1000
+
+        if self.__pendingLoad is not None:
+            if not self.runLoadingSteps(self.__pendingLoad, deadline):
+                return
+
+            self.__pendingLoad = None
+
+            # the transition was waiting for the scene
+            if self.__transitionAction == Engine.TRANSITION_ACTION_LOAD:
+                self.finishPendingPush()
+
+        for scene, steps in self.__preloads.items():
+            if steps is None:
+                continue
+
+            if time.perf_counter() >= deadline or not self.runLoadingSteps(steps, deadline):
+                return
+
+            self.__preloads[scene] = None
+
+    '''
+    Recorded and replayed sessions do not load within a time budget, the update pushing a scene would depend on the speed of the machine
+    The pending scene is then loaded at once when its transition finishes, and a preloaded scene when it replaces the current one
+    '''
+    def isLoadingBudgeted(self) -> bool:
+        return Input.getMode() == Input.MODE_LIVE
+
+    '''
+    Runs loading steps until the deadline, at least one, returns True once they are all done
+    '''
+    def runLoadingSteps(self, steps : Iterator, deadline : float) -> bool:
+        try:
+            while True:
+                next(steps)
+
+                if time.perf_counter() >= deadline:
+                    return False
+        except StopIteration:
+            return True
+
+    def updateScene(self, scene : Scene, dt : int, events : List[pygame.event.Event]):
+        if not self.__perfHud.isVisible() and not Profiler.enabled:
+            scene.update(dt, events)
+            return
+
+        start = time.perf_counter()
+        scene.update(dt, events)
+        duration = (time.perf_counter() - start) * 1000
+
+        if self.__perfHud.isVisible():
+            self.getSceneTimes(scene)[0] += duration
+        if Profiler.enabled:
+            Profiler.record("Scene.update", type(scene).__name__, duration)
 
     def draw(self):
         for scene in self.__sceneDrawOrder:
+            self.drawScene(scene)
+
+        if self.__transitionScene is not None:
+            self.drawScene(self.__transitionScene)
+
+        self.__perfHud.draw()
+
+    def drawScene(self, scene : Scene):
+        if not self.__perfHud.isVisible() and not Profiler.enabled:
             scene.draw()
+            return
+
+        start = time.perf_counter()
+        scene.draw()
+        duration = (time.perf_counter() - start) * 1000
+
+        if self.__perfHud.isVisible():
+            self.getSceneTimes(scene)[1] += duration
+        if Profiler.enabled:
+            Profiler.record("Scene.draw", type(scene).__name__, duration)
+
+    def getSceneTimes(self, scene : Scene) -> List[float]:
+        if scene not in self.__scenesTimes:
+            self.__scenesTimes[scene] = [0, 0]
+
+        return self.__scenesTimes[scene]
+
+    def shouldDraw(self, dt : float) -> bool:
+        if not self.__renderingEnabled:
+            return False
+
+        # Skip drawing if the last frame took at least twice its duration
+        if self.__framesSkipped < Engine.MAX_FRAMES_SKIPPED and dt >= 2 * 1000 / self.__framerate:
+            self.__framesSkipped += 1
+            return False
+
+        self.__framesSkipped = 0
+        return True
+
+    def getDirtyRects(self) -> List[pygame.Rect]:
+        if self.__fullRedraw:
+            self.__fullRedraw = False
+            return None
 
+        dirtyRects = []
+
+        scenes = self.__sceneDrawOrder
         if self.__transitionScene is not None:
-            self.__transitionScene.draw()
+            scenes = scenes + [self.__transitionScene]
+
+        for scene in scenes:
+            sceneDirtyRects = scene.getDirtyRects()
+
+            if sceneDirtyRects is None:
+                return None
+
+            dirtyRects += sceneDirtyRects
+
+        if self.__perfHud.isVisible():
+            dirtyRects.append(self.__perfHud.getRect())
+
+        return dirtyRects
+
+    def presentDirtyRects(self):
+        dirtyRects = self.getDirtyRects()
+
+        # Full redraw
+        if dirtyRects is None:
+            self.__window.fill((0, 0, 0, 0))
+            self.draw()
+            self.pushDisplay(None)
+            return
+
+        # Nothing changed
+        if len(dirtyRects) == 0:
+            return
 
-        # FPS Counter
-        if Engine.SHOW_FPS_COUNTER:
-            fpsCount = str(self.__clock.get_fps())[:4] + " FPS"
-            fpsCounter = FontManager.getFont("Emerald32Bold").render(fpsCount, 0, (255, 255, 255))
-            self.__window.blit(fpsCounter, (10, 10))
+        # Clear and redraw the bounding rect of all the dirty rects
+        # then only push the dirty rects themselves
+        clipRect = dirtyRects[0].unionall(dirtyRects[1:])
+
+        self.__window.set_clip(clipRect)
+        self.__window.fill((0, 0, 0, 0), clipRect)
+        self.draw()
+        self.__window.set_clip(None)
+
+        self.pushDisplay(dirtyRects)
 
     def onTransitionFinish(self):
         if self.__transitionAction == Engine.TRANSITION_ACTION_PUSH:
-            # push pending scene and clear transition
-            self.__transitionScene = None
-            self.pushScene(self.__pendingScene, None)
-            self.__pendingScene = None
+            if self.__pendingLoad is not None and not self.isLoadingBudgeted():
+                for _ in self.__pendingLoad:
+                    pass
+
+                self.__pendingLoad = None
+
+            if self.__pendingLoad is not None:
+                # keep the transition until the pending scene is loaded
+                self.__transitionAction = Engine.TRANSITION_ACTION_LOAD
+            else:
+                self.finishPendingPush()
         elif self.__transitionAction == Engine.TRANSITION_ACTION_POP:
             #pop current scene and clear transition
             self.__transitionScene = None
+            self.invalidateScreen()
             self.popScene(None)
 
     def pushScene(self, scene : Scene, transition : Scene):
@@ -174,23 +540,90 @@ class Engine:
             self.__transitionAction = Engine.TRANSITION_ACTION_PUSH
             self.__transitionScene = transition
             self.__pendingScene = scene
+            self.invalidateScreen()
+
+            # the scene is loaded a step at a time during the transition
+            self.__pendingLoad = scene.loadSteps()
             # we now wait for onTransitionFinish()
         else:
-            # pause the current active scene
-            if len(self.__sceneStack) > 0:
-                self.__sceneStack[-1].onPause()
-
             # load and push the new one
             scene.load()
-            self.__sceneStack.append(scene)
+            self.pushLoadedScene(scene)
+
+    def pushLoadedScene(self, scene : Scene):
+        # pause the current active scene
+        if len(self.__sceneStack) > 0:
+            self.__sceneStack[-1].onPause()
+
+        self.__sceneStack.append(scene)
+
+        # invalidate draw order
+        self.invalidateDrawOrder()
+
+    def finishPendingPush(self):
+        # push pending scene and clear transition
+        self.__transitionScene = None
+        self.__transitionAction = None
+        self.invalidateScreen()
+        self.pushLoadedScene(self.__pendingScene)
+        self.__pendingScene = None
+
+    '''
+    Loads the scene in the background, a few steps each frame, so that it can then replace the current one without loading it
+    '''
+    def preloadScene(self, scene : Scene):
+        self.__preloads[scene] = scene.loadSteps()
+
+    def isScenePreloaded(self, scene : Scene) -> bool:
+        return scene in self.__preloads and self.__preloads[scene] is None
+
+    '''
+    Stops loading the scene in the background and unloads it
+    '''
+    def cancelPreload(self, scene : Scene):
+        steps = self.__preloads.pop(scene)
+
+        if steps is not None:
+            steps.close()
+
+        scene.unload()
+
+    '''
+    Runs at once the loading steps the preloaded scene has left
+    '''
+    def finishPreload(self, scene : Scene):
+        steps = self.__preloads[scene]
+
+        if steps is not None:
+            for _ in steps:
+                pass
+
+            self.__preloads[scene] = None
+
+    '''
+    Replaces the current scene by the given one, without transition
+    The new scene must be preloaded, it was loaded while the current one was still loaded so the assets they share stayed loaded
+    '''
+    def replaceScene(self, scene : Scene):
+        if not self.isScenePreloaded(scene):
+            raise Exception("The scene must be preloaded before replacing the current one")
+
+        del self.__preloads[scene]
+
+        if len(self.__sceneStack) > 0:
+            self.__sceneStack[-1].unload()
+            self.__sceneStack.pop()
+
+        self.__sceneStack.append(scene)
 
-            # invalidate draw order
-            self.invalidateDrawOrder()
+        # invalidate draw order
+        self.invalidateDrawOrder()
 
     def popScene(self, transition : Scene):
         if transition is not None:
             self.__transitionAction = Engine.TRANSITION_ACTION_POP
             self.__transitionScene = transition
+            self.invalidateScreen()
             # we now wait for onTransitionFinish()
         else:
             # unload and pop the current scene
@@ -0,0 +1,186 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+import pygame
+
+from data.constants import Constants
+from lib.get_image_size import get_image_size
+
+
+class Atlas:
+    '''
+    Packs the small textures into atlas pages sharing a single color key
+    The index maps each packed texture name to its page and rect
+    '''
+
+    VERSION = 1
+
+    PAGE_SIZE = 1024  # size of the atlas pages in px
+    MAX_TEXTURE_SIZE = 256  # textures larger than this in any dimension are not packed
+    PADDING = 1  # px between two packed textures
+
+    # candidates for the pages color key, the first one no packed texture draws is used
+    # a color key is used rather than per-pixel alpha so that regions blit exactly like the original textures
+    COLOR_KEYS = [(255, 0, 255), (0, 255, 255), (255, 0, 128), (1, 2, 3)]
+
+    INDEX_PATH = os.path.join(Constants.ATLAS_PATH, "index.json")
+    PAGE_PATH = os.path.join(Constants.ATLAS_PATH, "page%d.png")
+
+    '''
+    Returns the index if it exists and is up to date with the given textures paths, None otherwise
+    '''
+    @staticmethod
+    def loadIndex(paths : Dict[str, str]) -> Dict:
+        if not os.path.exists(Atlas.INDEX_PATH):
+            return None
+
+        with open(Atlas.INDEX_PATH, "r") as f:
+            index = json.loads(f.read())
+
+        if index["version"] != Atlas.VERSION:
+            print("     Atlas index version mismatch, ignoring the atlas")
+            return None
+
+        for name in index["sources"]:
+            path, mtime = index["sources"][name]
+            if name not in paths or not os.path.exists(path) or os.path.getmtime(path) != mtime:
+                print("     Atlas is out of date (" + name + "), ignoring the atlas")
+                return None
+
+        return index
+
+    '''
+    Packs the given textures that are small enough, writes the pages and the index
+    '''
+    @staticmethod
+    def build(paths : Dict[str, str], colorKeys : Dict[str, List]) -> Dict:
+        # Only pack the small textures, the tallest first
+        sizes = {}
+        for name in paths:
+            width, height = get_image_size(paths[name])
+            if width <= Atlas.MAX_TEXTURE_SIZE and height <= Atlas.MAX_TEXTURE_SIZE:
+                sizes[name] = (width, height)
+
+        names = sorted(sizes, key=lambda n: (-sizes[n][1], -sizes[n][0], n))
+
+        rects = Atlas.pack([sizes[name] for name in names])
+
+        loadedTextures = {}
+        for name in names:
+            texture = pygame.image.load(paths[name])
+
+            # the alpha channel is dropped, like convert() does when textures are loaded on their own
+            texture = pygame.image.frombuffer(pygame.image.tostring(texture, "RGB"), texture.get_size(), "RGB")
+            if name in colorKeys:
+                texture.set_colorkey(colorKeys[name])
+            loadedTextures[name] = texture
+
+        colorKey = Atlas.findColorKey(loadedTextures.values())
+
+        # Draw the pages
+        pages = []
+        textures = {}
+        sources = {}
+
+        for name, (page, x, y) in zip(names, rects):
+            while page >= len(pages):
+                pages.append(pygame.Surface((Atlas.PAGE_SIZE, Atlas.PAGE_SIZE)))
+                pages[-1].fill(colorKey)
+
+            pages[page].blit(loadedTextures[name], (x, y))
+
+            textures[name] = [page, x, y, sizes[name][0], sizes[name][1]]
+            sources[name] = [paths[name], os.path.getmtime(paths[name])]
+
+        # Write the pages and the index
+        os.makedirs(Constants.ATLAS_PATH, exist_ok=True)
+
+        for i in range(len(pages)):
+            pygame.image.save(Atlas.cropPage(pages[i], [textures[name] for name in textures if textures[name][0] == i]), Atlas.PAGE_PATH % i)
+
+        index = {
+            "version": Atlas.VERSION,
+            "pages": [Atlas.PAGE_PATH % i for i in range(len(pages))],
+            "colorKey": list(colorKey),
+            "textures": textures,
+            "sources": sources
+        }
+
+        with open(Atlas.INDEX_PATH, "w") as f:
+            f.write(json.dumps(index, indent=2))
+
+        print("Packed " + str(len(textures)) + " textures in " + str(len(pages)) + " pages")
+
+        return index
+
+    '''
+    Returns the first candidate color key that none of the given textures draws
+    '''
+    @staticmethod
+    def findColorKey(textures) -> Tuple:
+        for colorKey in Atlas.COLOR_KEYS:
+            used = False
+            for texture in textures:
+                # pixels of the texture color key are not drawn
+                if texture.get_colorkey() is not None and tuple(texture.get_colorkey()[:3]) == colorKey:
+                    continue
+
+                if pygame.mask.from_threshold(texture, colorKey, (1, 1, 1, 255)).count() > 0:
+                    used = True
+                    break
+
+            if not used:
+                return colorKey
+
+        raise Exception("No color key available for the atlas, add a candidate to Atlas.COLOR_KEYS")
+
+    '''
+    Shelf packing : returns (page, x, y) for each of the given sizes, in the same order
+    '''
+    @staticmethod
+    def pack(sizes : List[Tuple]) -> List[Tuple]:
+        rects = []
+
+        page = 0
+        shelfX = 0
+        shelfY = 0
+        shelfHeight = 0
+
+        for width, height in sizes:
+            # next shelf
+            if shelfX + width > Atlas.PAGE_SIZE:
+                shelfX = 0
+                shelfY += shelfHeight + Atlas.PADDING
+                shelfHeight = 0
+
+            # next page
+            if shelfY + height > Atlas.PAGE_SIZE:
+                page += 1
+                shelfX = 0
+                shelfY = 0
+                shelfHeight = 0
+
+            rects.append((page, shelfX, shelfY))
+
+            shelfX += width + Atlas.PADDING
+            shelfHeight = max(shelfHeight, height)
+
+        return rects
+
+    '''
+    Crops the page to the rects it contains
+    '''
+    @staticmethod
+    def cropPage(page : pygame.Surface, rects : List[List]) -> pygame.Surface:
+        width = max(x + w for _, x, y, w, h in rects)
+        height = max(y + h for _, x, y, w, h in rects)
+
+        return page.subsurface((0, 0, width, height)).copy()
+
+
+if __name__ == '__main__':
+    from engine.graphics.textures import Textures
+
+    Textures.indexFiles()
+    Atlas.build(*Textures.getSources())
@@ -14,10 +14,10 @@ class Charset:
 
     @staticmethod
     def ofTexture(texture: pygame.Surface, orientation: int):
-        return Charset(Textures.getTexture(texture), orientation)
+        return Charset(texture, orientation)
 
-    def __init__(self, texture: pygame.Surface, orientation: int):
-        self.__texture = texture  # the texture surface
+    def __init__(self, texture: str, orientation: int):
+        self.__texture = texture  # the texture name, only used while loading since the steps surfaces are copies
         self.__orientation = orientation  # the current character orientation
         self.__step = 0  # the current step
 
@@ -27,8 +27,10 @@ class Charset:
         self.__surfaceMatrix = []
 
     def load(self):
-        width = self.__texture.get_width()
-        height = self.__texture.get_height()
+        texture = Textures.getTexture(self.__texture)
+
+        width = texture.get_width()
+        height = texture.get_height()
 
         self.__stepWidth = width / Charset.COLUMNS
         self.__stepHeight = height / Charset.LINES
@@ -39,7 +41,7 @@ class Charset:
                 self.__surfaceMatrix[y].append([])
                 surface = pygame.Surface((self.__stepWidth, self.__stepHeight), pygame.SRCALPHA, 32)
 
-                surface.blit(self.__texture, (0,0), (x * self.__stepWidth, y * self.__stepHeight, self.__stepWidth, self.__stepWidth))
+                surface.blit(texture, (0,0), (x * self.__stepWidth, y * self.__stepHeight, self.__stepWidth, self.__stepWidth))
 
                 self.__surfaceMatrix[y][x] = surface
 
@@ -10,6 +10,7 @@ from pypeg2 import contiguous, attr, parse, word, maybe_some
 from engine.graphics.fontmanager import FontManager
 from engine.graphics.frame import Frame
 from engine.graphics.textures import Textures
+from engine.profiler import Profiler
 from engine.timer import Timer
 from engine.tween.easing import Easing
 from engine.tween.tween import Tween
@@ -125,11 +126,14 @@ class DialogRenderer:
         self.__shakingChunks = []
         self.__wavingChunksTweens = []
 
+        self.__blitsCount = 0  # number of blits made by the last draw()
+
         # Rich text parser variables
         self.__lastWhitespacePosOnTheLine = 0
         self.__currentPosOnTheLine = 0
         self.__xOffset = 0
 
+    @Profiler.hook("DialogRenderer.buildLines")
     def buildLines(self, tree):
         for text in tree.text:
             textType = type(text)
@@ -274,6 +278,19 @@ class DialogRenderer:
 
 
 
+    def getBlitsCount(self) -> int:
+        return self.__blitsCount
+
+    def getActiveTweensCount(self) -> int:
+        return len(self.__wavingChunksTweens)
+
+    def getActiveTimersCount(self) -> int:
+        timers = [self.__caretTimer, self.__shakingTimer]
+        if self.__parserState == DialogRenderer.STATE_READY:
+            timers.append(self.__characterTimer)
+
+        return len([t for t in timers if t.alive])
+
     def hasReachedEndOfPage(self):
         return (self.__currentlyDrawingLine == self.__currentPageOffset + self.__linesMax) or (not self.__characterTimer.alive)
 
@@ -294,12 +311,16 @@ class DialogRenderer:
 
         self.__characterTimer.restart()
 
+    @Profiler.hook("DialogRenderer.draw")
     def draw(self):
+        self.__blitsCount = 0
+
         if not self.__alive:
             return
 
         # Draw frame
         self.__frame.draw()
+        self.__blitsCount += 1
 
         if self.__parserState != DialogRenderer.STATE_READY:
             return
@@ -316,10 +337,11 @@ class DialogRenderer:
                 continue
 
             for chunk in line[:self.__linesCharactersIndex[lineIndex]]:
-                cx = self.__boundaries[0] + Frame.PADDING + xOffset + chunk.animationXOffset.value
-                cy = self.__boundaries[1] + Frame.PADDING + yOffset + DialogRenderer.Y_OFFSET + chunk.yOffset + chunk.animationYOffset.value
+                cx = self.__boundaries[0] + Frame.PADDING + xOffset + chunk.animationXOffset.getRenderValue()
+                cy = self.__boundaries[1] + Frame.PADDING + yOffset + DialogRenderer.Y_OFFSET + chunk.yOffset + chunk.animationYOffset.getRenderValue()
 
                 self.__window.blit(chunk.surface, (cx, cy))
+                self.__blitsCount += 1
 
                 if self.stateEnabled(chunk.state, "Strike"):
                     pygame.draw.rect(self.__window, DialogRenderer.DEFAULT_TEXT_COLOR, (cx - 4, cy + 2 + chunk.surface.get_height() / 2, chunk.surface.get_width() + 4, 2))  # TODO Put right text color here
@@ -337,6 +359,7 @@ class DialogRenderer:
         # Draw the caret
         if self.hasReachedEndOfPage():
             self.__window.blit(self.__caretTexture, (lastXOffset + 32, self.__boundaries[1] + Frame.PADDING + lastYOffset), (0, self.__caretStep, 32, 32))
+            self.__blitsCount += 1
 
 
 
@@ -1,8 +1,11 @@
+import io
 import os
 from enum import Enum
 
 import pygame
 
+from engine.assetloader import AssetLoader
+
 
 class FontStyle(Enum):
     REGULAR = 0b1
@@ -23,17 +26,39 @@ class FontManager:
         "DialogBig": ("Emerald", 42, FontStyle.REGULAR),
         "DialogRegular": ("Emerald", 32, FontStyle.REGULAR),
         "Emerald32Regular" : ("Emerald", 32, FontStyle.REGULAR),
-        "Emerald32Bold" : ("Emerald", 32, FontStyle.BOLD)
+        "Emerald32Bold" : ("Emerald", 32, FontStyle.BOLD),
+        "Emerald20Regular" : ("Emerald", 20, FontStyle.REGULAR)
     }
 
     __fonts = {}
 
     @staticmethod
-    def load():
+    def load(loader : AssetLoader = None):
+        batch = loader if loader is not None else AssetLoader("fonts")
+
+        # Fonts files are read by the workers, the faces are created on the main thread
         from data.constants import Constants
+        for fontFile in FontManager.FONT_FILES:
+            batch.add("fonts." + fontFile, lambda path=os.path.join(Constants.FONTS_PATH, FontManager.FONT_FILES[fontFile]): FontManager.readFile(path), lambda data, name=fontFile: FontManager.addFaces(name, data))
+
+        if loader is None:
+            batch.run()
+
+    @staticmethod
+    def readFile(path : str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    '''
+    Creates the faces of the given font file
+    '''
+    @staticmethod
+    def addFaces(fontFile : str, data : bytes):
         for fontFace in FontManager.FONT_FACES:
-            fontName = FontManager.FONT_FILES[FontManager.FONT_FACES[fontFace][0]]
-            font = pygame.font.Font(os.path.join(Constants.FONTS_PATH, fontName), FontManager.FONT_FACES[fontFace][1])
+            if FontManager.FONT_FACES[fontFace][0] != fontFile:
+                continue
+
+            font = pygame.font.Font(io.BytesIO(data), FontManager.FONT_FACES[fontFace][1])
 
             fontFlags = FontManager.FONT_FACES[fontFace][2]
 
@@ -0,0 +1,147 @@
+from typing import List, Tuple, Dict
+
+import pygame
+
+from engine.graphics.fontmanager import FontManager
+
+
+class PerfHUD:
+
+    FONT = "Emerald20Regular"
+    TEXT_COLOR = (255, 255, 255)
+    BACKGROUND_COLOR = (0, 0, 0, 160)
+
+    POSITION = (10, 10)
+    PADDING = 6
+    LINE_HEIGHT = 18
+
+    REFRESH_PERIOD = 250  # ms between two refreshes of the displayed values, averaged over the period
+
+    GRAPH_SIZE = (200, 50)  # size of the frame times graph in px, one column per frame
+    GRAPH_SCALE = 1.5  # height in px of one ms in the graph
+    GRAPH_BACKGROUND_COLOR = (20, 20, 20)
+    GRAPH_COLOR = (80, 200, 80)
+    GRAPH_LATE_COLOR = (220, 70, 70)  # frames longer than the target frame duration
+    GRAPH_TARGET_COLOR = (120, 120, 120)
+
+    def __init__(self, window : pygame.Surface, framerate : int):
+        self.__window = window
+        self.__targetFrameTime = 1000 / framerate  # in ms
+
+        self.__visible = True
+
+        self.__texts = []  # texts of the lines currently displayed
+        self.__textsCache = {}  # text -> rendered surface, only rendered again when a value changes
+
+        self.__background = None  # the panel background, only created again when the panel size changes
+        self.__rect = pygame.Rect(PerfHUD.POSITION, (0, 0))  # the panel rect on screen
+
+        self.__graph = pygame.Surface(PerfHUD.GRAPH_SIZE)
+        self.__graph.fill(PerfHUD.GRAPH_BACKGROUND_COLOR)
+
+        # values accumulated since the last refresh
+        self.__elapsed = 0
+        self.__framesCount = 0
+        self.__frameTime = 0
+        self.__presentTime = 0
+        self.__scenesTimes = {}  # scene name -> [update time, draw time]
+        self.__counters = {}  # counter name -> value of the last frame
+
+    def isVisible(self) -> bool:
+        return self.__visible
+
+    def toggle(self):
+        self.__visible = not self.__visible
+
+    def getRect(self) -> pygame.Rect:
+        return self.__rect
+
+    def recordFrame(self, frameTime : float, scenesTimes : List[Tuple], presentTime : float, counters : Dict):
+        self.__elapsed += frameTime
+        self.__framesCount += 1
+        self.__frameTime += frameTime
+        self.__presentTime += presentTime
+        self.__counters = counters
+
+        for sceneName, updateTime, drawTime in scenesTimes:
+            if sceneName not in self.__scenesTimes:
+                self.__scenesTimes[sceneName] = [0, 0]
+            self.__scenesTimes[sceneName][0] += updateTime
+            self.__scenesTimes[sceneName][1] += drawTime
+
+        self.updateGraph(frameTime)
+
+        if self.__elapsed >= PerfHUD.REFRESH_PERIOD:
+            self.refresh()
+
+    def updateGraph(self, frameTime : float):
+        # scroll the graph and only draw the new column
+        width, height = PerfHUD.GRAPH_SIZE
+
+        self.__graph.scroll(-1, 0)
+        self.__graph.fill(PerfHUD.GRAPH_BACKGROUND_COLOR, (width - 1, 0, 1, height))
+
+        barHeight = min(height, int(frameTime * PerfHUD.GRAPH_SCALE))
+        color = PerfHUD.GRAPH_LATE_COLOR if frameTime > self.__targetFrameTime + 1 else PerfHUD.GRAPH_COLOR
+        self.__graph.fill(color, (width - 1, height - barHeight, 1, barHeight))
+
+        targetY = height - int(self.__targetFrameTime * PerfHUD.GRAPH_SCALE)
+        if targetY >= 0:
+            self.__graph.set_at((width - 1, targetY), PerfHUD.GRAPH_TARGET_COLOR)
+
+    def refresh(self):
+        framesCount = self.__framesCount
+        frameTime = self.__frameTime / framesCount
+
+        texts = [
+            "%.1f FPS  %.2f ms" % (1000 / frameTime if frameTime > 0 else 0, frameTime)
+        ]
+
+        for sceneName in self.__scenesTimes:
+            updateTime, drawTime = self.__scenesTimes[sceneName]
+            texts.append("%s  upd %.2f  draw %.2f ms" % (sceneName, updateTime / framesCount, drawTime / framesCount))
+
+        texts.append("present %.2f ms  blits %d" % (self.__presentTime / framesCount, self.__counters.get("blits", 0)))
+        texts.append("tweens %d  timers %d  interpreters %d" % (self.__counters.get("tweens", 0), self.__counters.get("timers", 0), self.__counters.get("interpreters", 0)))
+
+        # Render the texts that changed, drop the others
+        font = FontManager.getFont(PerfHUD.FONT)
+        textsCache = {}
+        for text in texts:
+            textsCache[text] = self.__textsCache[text] if text in self.__textsCache else font.render(text, 0, PerfHUD.TEXT_COLOR)
+
+        self.__texts = texts
+        self.__textsCache = textsCache
+
+        # Panel size
+        width = max(PerfHUD.GRAPH_SIZE[0], max(surface.get_width() for surface in textsCache.values())) + PerfHUD.PADDING * 2
+        height = len(texts) * PerfHUD.LINE_HEIGHT + PerfHUD.GRAPH_SIZE[1] + PerfHUD.PADDING * 3
+
+        if self.__background is None or self.__background.get_size() != (width, height):
+            self.__background = pygame.Surface((width, height), pygame.SRCALPHA, 32)
+            self.__background.fill(PerfHUD.BACKGROUND_COLOR)
+
+            # the rect never shrinks so that a smaller panel still clears the previous one
+            self.__rect = pygame.Rect(PerfHUD.POSITION, (width, height)).union(self.__rect)
+
+        # Reset the accumulated values
+        self.__elapsed = 0
+        self.__framesCount = 0
+        self.__frameTime = 0
+        self.__presentTime = 0
+        self.__scenesTimes = {}
+
+    def draw(self):
+        if not self.__visible or self.__background is None:
+            return
+
+        x, y = PerfHUD.POSITION
+
+        self.__window.blit(self.__background, (x, y))
+
+        y += PerfHUD.PADDING
+        for text in self.__texts:
+            self.__window.blit(self.__textsCache[text], (x + PerfHUD.PADDING, y))
+            y += PerfHUD.LINE_HEIGHT
+
+        self.__window.blit(self.__graph, (x + PerfHUD.PADDING, y + PerfHUD.PADDING))
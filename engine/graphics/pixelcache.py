@@ -0,0 +1,104 @@
+import hashlib
+import os
+import struct
+import tempfile
+from typing import Tuple
+
+import pygame
+
+from data.constants import Constants
+
+
+class PixelCache:
+    '''
+    On-disk cache of decoded textures, so that PNG files are only decoded once
+    Each cached texture is a header followed by its raw RGB pixels
+    '''
+
+    VERSION = 1
+    MAGIC = b"PKPX"
+    FORMAT = "RGB"
+
+    # magic, version, width, height, has color key, color key r g b, source mtime, source sha1
+    HEADER = struct.Struct("<4sHIIB3Bd20s")
+    MTIME_OFFSET = 18  # offset of the source mtime in the header
+
+    @staticmethod
+    def getCachePath(name : str) -> str:
+        return os.path.join(Constants.PIXEL_CACHE_PATH, name + ".pix")
+
+    @staticmethod
+    def hashFile(path : str) -> bytes:
+        with open(path, "rb") as f:
+            return hashlib.sha1(f.read()).digest()
+
+    '''
+    Returns the cached surface of the given texture (not converted yet), None if not cached or out of date
+    '''
+    @staticmethod
+    def load(name : str, sourcePath : str, colorKey : Tuple) -> pygame.Surface:
+        cachePath = PixelCache.getCachePath(name)
+        if not os.path.exists(cachePath):
+            return None
+
+        with open(cachePath, "rb") as f:
+            data = f.read()
+
+        if len(data) < PixelCache.HEADER.size:
+            return None
+
+        magic, version, width, height, hasColorKey, r, g, b, mtime, sha1 = PixelCache.HEADER.unpack_from(data)
+
+        if magic != PixelCache.MAGIC or version != PixelCache.VERSION:
+            return None
+
+        if (tuple(colorKey) if colorKey is not None else None) != ((r, g, b) if hasColorKey else None):
+            return None
+
+        # only hash the source if it was touched
+        if os.path.getmtime(sourcePath) != mtime:
+            if PixelCache.hashFile(sourcePath) != sha1:
+                return None
+
+            PixelCache.touch(cachePath, os.path.getmtime(sourcePath))
+
+        pixels = memoryview(data)[PixelCache.HEADER.size:]
+        if len(pixels) != width * height * len(PixelCache.FORMAT):
+            return None
+
+        return pygame.image.frombuffer(pixels, (width, height), PixelCache.FORMAT)
+
+    '''
+    Writes the pixels of the given texture to the cache
+    '''
+    @staticmethod
+    def store(name : str, sourcePath : str, colorKey : Tuple, surface : pygame.Surface):
+        os.makedirs(Constants.PIXEL_CACHE_PATH, exist_ok=True)
+
+        width, height = surface.get_size()
+        r, g, b = colorKey[:3] if colorKey is not None else (0, 0, 0)
+
+        header = PixelCache.HEADER.pack(PixelCache.MAGIC, PixelCache.VERSION, width, height, colorKey is not None, r, g, b, os.path.getmtime(sourcePath), PixelCache.hashFile(sourcePath))
+
+        # written to a temporary file first so that an interrupted write never leaves a truncated cache file
+        # the file is unique so that concurrent writers of the same texture (loader workers) do not write to the same one
+        cachePath = PixelCache.getCachePath(name)
+        fd, tempPath = tempfile.mkstemp(dir=os.path.dirname(cachePath), prefix=os.path.basename(cachePath) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                f.write(pygame.image.tostring(surface, PixelCache.FORMAT))
+
+            os.replace(tempPath, cachePath)
+        except BaseException:
+            os.remove(tempPath)
+            raise
+
+    '''
+    Updates the source mtime of a cached texture whose source was touched without being modified
+    '''
+    @staticmethod
+    def touch(cachePath : str, mtime : float):
+        with open(cachePath, "r+b") as f:
+            f.seek(PixelCache.MTIME_OFFSET)
+            f.write(struct.pack("<d", mtime))
@@ -1,38 +1,253 @@
 import json
-from typing import List
+from collections import OrderedDict
+from typing import List, Tuple, Dict
 
 from data.constants import *
 import glob
 import pygame
 
+from engine.assetloader import AssetLoader
+from engine.graphics.pixelcache import PixelCache
+from lib.get_image_size import get_image_size
+
 
 class Textures:
 
-    __textures = {}
+    MEMORY_BUDGET = 32 * 1024 * 1024  # bytes of loaded textures above which the least recently used unpinned ones are evicted
+    BYTES_PER_PIXEL = 4  # estimated size of a converted pixel
+    ATLAS_PAGE_NAME = "@atlas%d"  # texture name of the atlas pages
+    PIXEL_CACHE = True  # are decoded textures cached on disk ?
+
+    __paths = {}  # texture name -> file path, for all the textures
+    __regions = {}  # texture name -> (atlas page name, rect), for the textures packed in the atlas
+    __regionsSurfaces = {}  # texture name -> subsurface of its atlas page, for the loaded regions
+    __colorKeys = {}  # texture name -> color key
+    __textures = OrderedDict()  # texture name -> surface, for the loaded textures, least recently used first
+    __sizes = {}  # texture name -> estimated size in bytes, for the loaded textures
+    __pins = {}  # texture name -> number of holders, for the pinned textures
+    __usedMemory = 0  # estimated size in bytes of the loaded textures
 
     @staticmethod
     def load():
-        # Load all textures
+        Textures.indexFiles()
+
+        # Textures packed in the atlas are read from its pages
+        from engine.graphics.atlas import Atlas
+        index = Atlas.loadIndex(Textures.__paths)
+
+        if index is not None:
+            for i in range(len(index["pages"])):
+                Textures.__paths[Textures.ATLAS_PAGE_NAME % i] = index["pages"][i]
+                Textures.__colorKeys[Textures.ATLAS_PAGE_NAME % i] = index["colorKey"]
+
+            for name in index["textures"]:
+                page, x, y, width, height = index["textures"][name]
+                Textures.__regions[name] = (Textures.ATLAS_PAGE_NAME % page, pygame.Rect(x, y, width, height))
+
+            print("     Atlas : " + str(len(Textures.__regions)) + " textures in " + str(len(index["pages"])) + " pages")
+
+        print("     Textures count : " + str(len(Textures.__paths)))
+
+    @staticmethod
+    def indexFiles():
+        # Index all textures, they are only loaded when used
         size = len(Constants.IMG_PATH)+1
         for f in glob.iglob(os.path.join(Constants.IMG_PATH, '**','*.png'), recursive=True):
             textureName = f[size:len(f)-4]
             textureName = textureName.replace(os.path.sep, ".")
-            Textures.__textures[textureName] = pygame.image.load(f).convert()
+            Textures.__paths[textureName] = f
 
-        # Apply color keys when necessary
+        # Color keys are applied when loading
         with open(Constants.COLOR_KEYS_PATH, "r") as f:
             colorKeys = json.loads(f.read())
             for c in colorKeys:
-                if c in Textures.__textures:
-                    Textures.__textures[c].set_colorkey(colorKeys[c])
+                if c in Textures.__paths:
+                    Textures.__colorKeys[c] = colorKeys[c]
                 else:
                     raise Exception("Error while applying color key to texture " + c + " : texture does not exist")
 
+    '''
+    Returns the files paths and color keys of the textures, by name
+    '''
+    @staticmethod
+    def getSources() -> Tuple[Dict, Dict]:
+        return Textures.__paths, Textures.__colorKeys
 
     @staticmethod
     def unload():
-        Textures.__textures = {}
+        Textures.__paths = {}
+        Textures.__regions = {}
+        Textures.__regionsSurfaces = {}
+        Textures.__colorKeys = {}
+        Textures.__textures = OrderedDict()
+        Textures.__sizes = {}
+        Textures.__pins = {}
+        Textures.__usedMemory = 0
 
     @staticmethod
     def getTexture(name : str) -> pygame.Surface:
-        return Textures.__textures[name]
\ No newline at end of file
+        if name in Textures.__regions:
+            return Textures.getRegion(name)
+
+        texture = Textures.__textures.get(name)
+
+        if texture is not None:
+            Textures.__textures.move_to_end(name)
+            return texture
+
+        return Textures.loadTexture(name)
+
+    """
+    Returns the texture and pins it until releaseTexture() is called as many times
+    Pinned textures are never evicted
+    """
+    @staticmethod
+    def acquireTexture(name : str) -> pygame.Surface:
+        texture = Textures.getTexture(name)
+
+        # regions pin their atlas page
+        if name in Textures.__regions:
+            name = Textures.__regions[name][0]
+
+        Textures.__pins[name] = Textures.__pins.get(name, 0) + 1
+        return texture
+
+    @staticmethod
+    def releaseTexture(name : str):
+        if name in Textures.__regions:
+            name = Textures.__regions[name][0]
+
+        pins = Textures.__pins.get(name, 0) - 1
+
+        if pins > 0:
+            Textures.__pins[name] = pins
+        else:
+            Textures.__pins.pop(name, None)
+
+    '''
+    Returns the region of its atlas page for a packed texture
+    '''
+    @staticmethod
+    def getRegion(name : str) -> pygame.Surface:
+        pageName, rect = Textures.__regions[name]
+        page = Textures.getTexture(pageName)
+
+        # the subsurface is created again if the page was evicted and loaded again
+        surface = Textures.__regionsSurfaces.get(name)
+        if surface is None or surface.get_parent() is not page:
+            surface = page.subsurface(rect)
+            Textures.__regionsSurfaces[name] = surface
+
+        return surface
+
+    @staticmethod
+    def loadTexture(name : str) -> pygame.Surface:
+        path = Textures.getPath(name)
+
+        # Make room before decoding, the size is read from the file header
+        textureSize = Textures.getTextureSize(path)
+        Textures.evict(Textures.MEMORY_BUDGET - textureSize)
+
+        return Textures.addTexture(name, Textures.decodeTexture(name, path), textureSize)
+
+    '''
+    Adds the textures that are not loaded yet to the given loader batch
+    They are decoded by its workers and converted when the batch finishes
+    '''
+    @staticmethod
+    def preload(names : List[str], loader : AssetLoader):
+        for name in names:
+            # regions are loaded with their atlas page
+            if name in Textures.__regions:
+                name = Textures.__regions[name][0]
+
+            # several regions of the batch may be on the same page
+            if name in Textures.__textures or loader.hasAsset("textures." + name):
+                continue
+
+            path = Textures.getPath(name)
+            textureSize = Textures.getTextureSize(path)
+
+            loader.add("textures." + name, lambda name=name, path=path: Textures.decodeTexture(name, path), lambda texture, name=name, size=textureSize: Textures.finishPreload(name, texture, size))
+
+    @staticmethod
+    def finishPreload(name : str, texture : pygame.Surface, textureSize : int):
+        # the texture may have been loaded since the batch was decoded (batches decoded ahead by the map worker)
+        if name in Textures.__textures:
+            return
+
+        Textures.evict(Textures.MEMORY_BUDGET - textureSize)
+        Textures.addTexture(name, texture, textureSize)
+
+    @staticmethod
+    def getPath(name : str) -> str:
+        if name not in Textures.__paths:
+            raise Exception("Unknown texture " + name)
+
+        return Textures.__paths[name]
+
+    @staticmethod
+    def getTextureSize(path : str) -> int:
+        width, height = get_image_size(path)
+        return width * height * Textures.BYTES_PER_PIXEL
+
+    '''
+    Converts a decoded texture to the display format and adds it to the loaded textures
+    Must be called on the main thread
+    '''
+    @staticmethod
+    def addTexture(name : str, texture : pygame.Surface, textureSize : int) -> pygame.Surface:
+        texture = texture.convert()
+        if name in Textures.__colorKeys:
+            texture.set_colorkey(Textures.__colorKeys[name])
+
+        Textures.__textures[name] = texture
+        Textures.__sizes[name] = textureSize
+        Textures.__usedMemory += textureSize
+
+        return texture
+
+    '''
+    Returns the pixels of the texture, from the pixel cache if possible
+    Can be called from the asset loader workers
+    '''
+    @staticmethod
+    def decodeTexture(name : str, path : str) -> pygame.Surface:
+        if not Textures.PIXEL_CACHE:
+            return pygame.image.load(path)
+
+        colorKey = Textures.__colorKeys.get(name)
+
+        texture = PixelCache.load(name, path, colorKey)
+        if texture is None:
+            texture = pygame.image.load(path)
+            PixelCache.store(name, path, colorKey, texture)
+
+        return texture
+
+    """
+    Evicts the least recently used unpinned textures until the used memory is under the given size in bytes
+    Evicted textures are loaded again the next time they are used
+    """
+    @staticmethod
+    def evict(size : int):
+        if Textures.__usedMemory <= size:
+            return
+
+        for name in list(Textures.__textures):
+            if Textures.__usedMemory <= size:
+                break
+
+            if name in Textures.__pins:
+                continue
+
+            del Textures.__textures[name]
+            Textures.__usedMemory -= Textures.__sizes.pop(name)
+
+    @staticmethod
+    def getUsedMemory() -> int:
+        return Textures.__usedMemory
+
+    @staticmethod
+    def getLoadedTextures() -> List[str]:
+        return list(Textures.__textures)
@@ -0,0 +1,164 @@
+import random
+from typing import List, Tuple
+
+import msgpack
+import pygame
+
+
+class ScriptedKeys:
+    # Mimics the sequence returned by pygame.key.get_pressed()
+    def __init__(self, keys : List[int]):
+        self.__keys = set(keys)
+
+    def __getitem__(self, key : int) -> bool:
+        return key in self.__keys
+
+
+class Input:
+
+    MODE_LIVE = 0  # inputs come from the keyboard
+    MODE_RECORD = 1  # inputs come from the keyboard and are recorded
+    MODE_REPLAY = 2  # inputs come from a recording
+
+    RECORDING_VERSION = 1
+
+    RECORDED_EVENTS = (pygame.KEYDOWN, pygame.KEYUP)  # only these events are recorded, with their key
+
+    __mode = MODE_LIVE
+    __scriptedKeys = None  # keys state replacing the keyboard state, None to read the keyboard
+
+    __recordingPath = None  # path of the recording being written
+    __seed = None  # the RNG seed of the recording
+    __frames = []  # recorded frames : [dt, pressed scancodes (None if unchanged), [[event type, key], ...]]
+    __frameIndex = 0  # index of the next frame to replay
+    __lastPressed = None  # last recorded or replayed pressed scancodes
+
+    """
+    Returns the pressed keys, indexed by pygame key constants
+    """
+    @staticmethod
+    def getPressedKeys():
+        if Input.__scriptedKeys is not None:
+            return Input.__scriptedKeys
+
+        return pygame.key.get_pressed()
+
+    """
+    Replaces the keyboard state by the given pressed keys
+    None to read the keyboard again
+    """
+    @staticmethod
+    def setScriptedKeys(keys : List[int]):
+        Input.__scriptedKeys = None if keys is None else ScriptedKeys(keys)
+
+    @staticmethod
+    def getMode() -> int:
+        return Input.__mode
+
+    """
+    Starts recording the inputs of every update, written to the given path by stopRecording()
+    The RNG is seeded with the given seed (a random one if None) and the seed is recorded
+    """
+    @staticmethod
+    def startRecording(path : str, seed : int = None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+
+        Input.__mode = Input.MODE_RECORD
+        Input.__recordingPath = path
+        Input.__seed = seed
+        Input.__frames = []
+        Input.__lastPressed = None
+
+        random.seed(seed)
+
+    """
+    Stops recording and writes the recording file
+    Does nothing if not recording
+    """
+    @staticmethod
+    def stopRecording():
+        if Input.__mode != Input.MODE_RECORD:
+            return
+
+        data = {
+            "version": Input.RECORDING_VERSION,
+            "seed": Input.__seed,
+            "frames": Input.__frames
+        }
+
+        with open(Input.__recordingPath, "wb") as f:
+            f.write(msgpack.packb(data, use_bin_type=True))
+
+        print("Recorded " + str(len(Input.__frames)) + " updates to " + Input.__recordingPath)
+
+        Input.__mode = Input.MODE_LIVE
+        Input.__scriptedKeys = None
+        Input.__frames = []
+
+    """
+    Loads a recording to replay its inputs and dt instead of the real ones
+    The RNG is seeded with the recorded seed
+    """
+    @staticmethod
+    def startReplay(path : str):
+        with open(path, "rb") as f:
+            data = msgpack.unpackb(f.read(), raw=False)
+
+        if data["version"] != Input.RECORDING_VERSION:
+            raise Exception("Unsupported recording version " + str(data["version"]))
+
+        Input.__mode = Input.MODE_REPLAY
+        Input.__seed = data["seed"]
+        Input.__frames = data["frames"]
+        Input.__frameIndex = 0
+        Input.__lastPressed = None
+
+        random.seed(Input.__seed)
+
+    @staticmethod
+    def getReplayLength() -> int:
+        return len(Input.__frames) if Input.__mode == Input.MODE_REPLAY else 0
+
+    @staticmethod
+    def isReplayFinished() -> bool:
+        return Input.__mode == Input.MODE_REPLAY and Input.__frameIndex >= len(Input.__frames)
+
+    """
+    Called by the engine before each update with the real dt and events
+    Returns the dt and events the update must use
+    """
+    @staticmethod
+    def processUpdate(dt : float, events : List[pygame.event.Event]) -> Tuple:
+        if Input.__mode == Input.MODE_RECORD:
+            keys = pygame.key.get_pressed()
+            pressed = [scancode for scancode, isPressed in enumerate(keys) if isPressed]
+
+            # the same keys state is used during the whole update
+            Input.__scriptedKeys = keys
+
+            recordedEvents = [[event.type, event.key] for event in events if event.type in Input.RECORDED_EVENTS]
+
+            Input.__frames.append([dt, pressed if pressed != Input.__lastPressed else None, recordedEvents])
+            Input.__lastPressed = pressed
+
+            return dt, events
+        elif Input.__mode == Input.MODE_REPLAY:
+            if Input.__frameIndex >= len(Input.__frames):
+                return dt, []
+
+            dt, pressed, recordedEvents = Input.__frames[Input.__frameIndex]
+            Input.__frameIndex += 1
+
+            if pressed is not None:
+                Input.__lastPressed = pressed
+
+                keys = [False] * len(pygame.key.get_pressed())
+                for scancode in pressed:
+                    keys[scancode] = True
+
+                Input.__scriptedKeys = pygame.key.ScancodeWrapper(keys)
+
+            return dt, [pygame.event.Event(eventType, key=key) for eventType, key in recordedEvents]
+
+        return dt, events
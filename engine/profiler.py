@@ -0,0 +1,157 @@
+import cProfile
+import functools
+import io
+import pstats
+import time
+from typing import Callable
+
+
+class Profiler:
+
+    enabled = False  # are the hooks aggregating ? - disabled hooks only cost a flag check
+
+    REPORT_LINES = 30  # number of cProfile functions printed at the end of a capture
+    CAPTURE_PATH = "profile_%d.prof"  # path of the cProfile stats written at the end of a capture (formatted with the capture start date)
+
+    __stats = {}  # hook name -> [calls count, cumulative time in ms, {name -> [calls count, cumulative time in ms]}]
+    __active = set()  # (hook name, instance id) of the hooked calls in progress
+    __framesCount = 0  # frames since the hooks stats were reset
+
+    __cProfile = None  # the cProfile.Profile of the capture in progress
+    __captureFrames = 0  # remaining frames of the capture in progress
+    __captureDate = 0
+
+    """
+    Decorator of the methods to profile
+    Calls are aggregated under the hook name, and under the name returned by nameGetter(self) if given
+    Nested calls on the same instance (recursion, super() calls) are part of the outermost call
+    """
+    @staticmethod
+    def hook(hookName : str, nameGetter : Callable = None):
+        def decorator(method):
+            @functools.wraps(method)
+            def wrapper(self, *args, **kwargs):
+                if not Profiler.enabled:
+                    return method(self, *args, **kwargs)
+
+                key = (hookName, id(self))
+                if key in Profiler.__active:
+                    return method(self, *args, **kwargs)
+
+                Profiler.__active.add(key)
+                start = time.perf_counter()
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    duration = (time.perf_counter() - start) * 1000
+                    Profiler.__active.discard(key)
+                    Profiler.record(hookName, nameGetter(self) if nameGetter is not None else None, duration)
+
+            return wrapper
+        return decorator
+
+    """
+    Aggregates a call of the given duration in ms
+    """
+    @staticmethod
+    def record(hookName : str, name : str, duration : float):
+        stats = Profiler.__stats.get(hookName)
+        if stats is None:
+            stats = Profiler.__stats[hookName] = [0, 0, {}]
+
+        stats[0] += 1
+        stats[1] += duration
+
+        if name is not None:
+            nameStats = stats[2].get(name)
+            if nameStats is None:
+                nameStats = stats[2][name] = [0, 0]
+
+            nameStats[0] += 1
+            nameStats[1] += duration
+
+    @staticmethod
+    def getStats() -> dict:
+        return Profiler.__stats
+
+    @staticmethod
+    def reset():
+        Profiler.__stats = {}
+        Profiler.__active = set()
+        Profiler.__framesCount = 0
+
+    """
+    Prints the aggregated hooks stats, sorted by cumulative time
+    """
+    @staticmethod
+    def printReport():
+        framesCount = Profiler.__framesCount
+
+        print("Hooks over " + str(framesCount) + " frames :")
+
+        for hookName, (calls, duration, names) in sorted(Profiler.__stats.items(), key=lambda item: -item[1][1]):
+            print("     %s : %d calls, %.2f ms (%.3f ms/frame)" % (hookName, calls, duration, duration / max(1, framesCount)))
+
+            for name, (nameCalls, nameDuration) in sorted(names.items(), key=lambda item: -item[1][1]):
+                print("          %s : %d calls, %.2f ms" % (name, nameCalls, nameDuration))
+
+    @staticmethod
+    def isCapturing() -> bool:
+        return Profiler.__cProfile is not None
+
+    """
+    Enables the hooks and starts cProfile for the given number of frames
+    """
+    @staticmethod
+    def startCapture(framesCount : int):
+        if Profiler.isCapturing():
+            return
+
+        print("Profiling " + str(framesCount) + " frames...")
+
+        Profiler.reset()
+        Profiler.enabled = True
+
+        Profiler.__captureFrames = framesCount
+        Profiler.__captureDate = int(time.time())
+        Profiler.__cProfile = cProfile.Profile()
+        Profiler.__cProfile.enable()
+
+    """
+    Stops the capture in progress, prints the reports and writes the cProfile stats
+    """
+    @staticmethod
+    def stopCapture():
+        if not Profiler.isCapturing():
+            return
+
+        Profiler.__cProfile.disable()
+        Profiler.enabled = False
+
+        Profiler.printReport()
+
+        output = io.StringIO()
+        stats = pstats.Stats(Profiler.__cProfile, stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(Profiler.REPORT_LINES)
+        print(output.getvalue())
+
+        path = Profiler.CAPTURE_PATH % Profiler.__captureDate
+        stats.dump_stats(path)
+        print("cProfile stats written to " + path)
+
+        Profiler.__cProfile = None
+
+    """
+    Called by the engine after each frame to end the capture after its frames window
+    """
+    @staticmethod
+    def onFrame():
+        if Profiler.enabled:
+            Profiler.__framesCount += 1
+
+        if not Profiler.isCapturing():
+            return
+
+        Profiler.__captureFrames -= 1
+        if Profiler.__captureFrames <= 0:
+            Profiler.stopCapture()
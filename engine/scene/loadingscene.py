@@ -0,0 +1,56 @@
+import math
+from typing import List
+
+import pygame
+
+from engine.scene.scene import Scene
+
+
+class LoadingScene(Scene):
+    '''
+    Transition showing a spinner until the pushed scene is loaded
+    It is over as soon as it starts : the engine keeps it running while the scene loads
+    '''
+
+    BACKGROUND_COLOR = (0, 0, 0)
+    SPINNER_COLOR = (255, 255, 255)
+    SPINNER_DOTS = 8
+    SPINNER_RADIUS = 12  # in px
+    SPINNER_DOT_RADIUS = 3  # in px
+    SPINNER_PERIOD = 800  # duration of a spinner turn in ms
+
+    def __init__(self, engine):
+        super().__init__(engine)
+
+        self.__time = 0  # time since the transition started in ms
+        self.__finished = False  # has the engine been notified ?
+
+    def update(self, dt : int, events : List[pygame.event.Event]):
+        super().update(dt, events)
+
+        self.__time += dt
+
+        if not self.__finished:
+            self.__finished = True
+            self.getEngine().onTransitionFinish()
+
+    def draw(self):
+        window = self.getEngine().getWindow()
+        window.fill(LoadingScene.BACKGROUND_COLOR)
+
+        # dots on a circle in the bottom right corner, the highlighted one turning
+        width, height = self.getEngine().getResolution()
+        centerX = width - LoadingScene.SPINNER_RADIUS * 2
+        centerY = height - LoadingScene.SPINNER_RADIUS * 2
+
+        current = int(self.__time / LoadingScene.SPINNER_PERIOD * LoadingScene.SPINNER_DOTS) % LoadingScene.SPINNER_DOTS
+
+        for i in range(LoadingScene.SPINNER_DOTS):
+            angle = 2 * math.pi * i / LoadingScene.SPINNER_DOTS
+            position = (centerX + int(math.cos(angle) * LoadingScene.SPINNER_RADIUS), centerY + int(math.sin(angle) * LoadingScene.SPINNER_RADIUS))
+
+            # the dots behind the highlighted one fade out
+            fade = ((current - i) % LoadingScene.SPINNER_DOTS) / LoadingScene.SPINNER_DOTS
+            color = tuple(int(c * (1 - fade)) for c in LoadingScene.SPINNER_COLOR)
+
+            pygame.draw.circle(window, color, position, LoadingScene.SPINNER_DOT_RADIUS)
@@ -5,6 +5,7 @@ import sys
 from typing import Dict, List, Callable, Tuple
 
 from data.constants import Constants
+from engine.profiler import Profiler
 from engine.savemanager import SaveManager
 from engine.scene.map.cantalscript import CantalParser, CantalInterpreter, BooleanLiteral, FunctionCallStatement, \
     StringLiteral, IntegerLiteral, Register, Literal, Symbol, Value, ValueSymbol
@@ -39,8 +40,6 @@ class Actor:
 
         self.__parameters = parameters
 
-        self.lastUpdateDate = 0  # the last time this actor was updated and drawn
-
         self.currentState = None # name of the current state
 
         # used to keep references to interpreters
@@ -89,6 +88,7 @@ class Actor:
     def getName(self) -> str:
         return self.__name
 
+    @Profiler.hook("Actor.update", lambda actor: actor.getName())
     def update(self, dt : int, events : List[pygame.event.Event]):
         # Notify interpreters that a new frame has been displayed
         # so that they can continue running the scripts
@@ -104,9 +104,59 @@ class Actor:
                 if timer is not None:
                     timer.update(dt)  # will self-delete in callback
 
+    def getActiveTweensCount(self) -> int:
+        return 0
+
+    def getActiveTimersCount(self) -> int:
+        return len([t for t in self.interpreterTimers.values() if t is not None and t.alive])
+
+    def getActiveInterpretersCount(self) -> int:
+        if self.currentState not in self.interpreters:
+            return 0
+
+        return len([i for i in self.interpreters[self.currentState].values() if i is not None and i.isRunning()])
+
     def isSpawned(self) -> bool:
         return self.__spawned
 
+    '''
+    Is the actor doing something that would be lost if it was unloaded (running script, movement) ?
+    The loop scripts are not taken into account since they start again when the actor is spawned
+    '''
+    def isBusy(self) -> bool:
+        if self.getActiveTweensCount() > 0:
+            return True
+
+        for interpreter in self.interpreters.get(self.currentState, {}).values():
+            if interpreter is not None and interpreter.isRunning() and not interpreter.isLoop():
+                return True
+
+        return False
+
+    '''
+    State of the actor to keep when it is unloaded to be created again later
+    The saved variables are not part of it since they are kept by the SaveManager
+    '''
+    def getState(self) -> Dict:
+        return {
+            "positionX": self.__posX,
+            "positionY": self.__posY,
+            "parameters": self.__parameters,
+            "variables": self.__cantalVariables
+        }
+
+    '''
+    Restores a state returned by getState(), after load() and before spawn()
+    '''
+    def setState(self, state : Dict):
+        if self.__spawned:
+            raise Exception("Cannot restore the state of a spawned actor")
+
+        self.__posX = state["positionX"]
+        self.__posY = state["positionY"]
+        self.__parameters = state["parameters"]
+        self.__cantalVariables = state["variables"]
+
     def activateRightState(self):
         if self.__script is None:
             return
@@ -147,11 +197,7 @@ class Actor:
                 # Load the script
                 self.__scriptKey = self.getScene().getMapName() + "." + self.__script + ".cantalscript"
 
-                if self.__scriptKey not in Actor.CANTAL_CACHE:
-                    scriptPath = os.path.join(Constants.ACTORS_PATH, self.getScene().getMapName(), self.__script + ".cantalscript")
-                    Actor.CANTAL_CACHE[self.__scriptKey] = CantalParser.parse(scriptPath)
-
-                scriptData = Actor.CANTAL_CACHE[self.__scriptKey]
+                scriptData = Actor.loadScript(self.getScene().getMapName(), self.__script)
 
                 self.__cantalScript = scriptData
 
@@ -196,6 +242,20 @@ class Actor:
             except FileNotFoundError:
                 raise Exception("Could not find a script named " + self.__script)
 
+    '''
+    Returns the parsed script, parsing it if it is not in the cache yet
+    Can be run by a worker thread to parse the scripts of a map ahead of time
+    '''
+    @staticmethod
+    def loadScript(mapName : str, script : str):
+        scriptKey = mapName + "." + script + ".cantalscript"
+
+        if scriptKey not in Actor.CANTAL_CACHE:
+            scriptPath = os.path.join(Constants.ACTORS_PATH, mapName, script + ".cantalscript")
+            Actor.CANTAL_CACHE[scriptKey] = CantalParser.parse(scriptPath)
+
+        return Actor.CANTAL_CACHE[scriptKey]
+
     def cantalFunctionCallback(self, interpreter, function : FunctionCallStatement):
         if function.name not in self.__cantalFunctions:
             raise Exception("Unknown Cantal function " + function.name)
@@ -303,8 +363,23 @@ class Actor:
                     self.interpreters[state][interpreter].reset()
                     self.interpreters[state][interpreter] = None
 
-    def draw(self, offsetX, offsetY):
-        pass
+    # Returns the number of blits made
+    @Profiler.hook("Actor.draw", lambda actor: actor.getName())
+    def draw(self, offsetX, offsetY) -> int:
+        sprite = self.getSprite(offsetX, offsetY)
+
+        if sprite is None:
+            return 0
+
+        self.getWindow().blit(*sprite)
+        return 1
+
+    '''
+    Surface and position in px this actor draws
+    with the given offsets, None if there is nothing to draw
+    '''
+    def getSprite(self, offsetX, offsetY) -> Tuple:
+        return None
 
     def getPosX(self) -> int:
         return self.__posX
@@ -1,8 +1,9 @@
 import math
 import pygame
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
 from engine.graphics.charset import Charset
+from engine.profiler import Profiler
 from engine.scene.map.actors.actor import Actor
 from engine.scene.map.mapscene import MapScene
 from engine.tween.easing import Easing
@@ -29,26 +30,37 @@ class NPCActor(Actor):
         self.registerCantalFunction("turnToFaceCharacter", self.cantalTurnToFaceCharacter)
         self.registerCantalFunction("walk", self.cantalWalk)
 
+    @Profiler.hook("Actor.update", lambda actor: actor.getName())
     def update(self, dt : int, events : List[pygame.event.Event]):
         super().update(dt, events)
         if self.__moveTween is not None:
             self.__moveTween.update(dt)
 
+    def getActiveTweensCount(self) -> int:
+        return 1 if self.__moveTween is not None and self.__moveTween.alive else 0
+
     def load(self):
         super().load()
         self.__charset.load()
 
         self.__charsetSurfaceOffset = (self.__charset.getSurfaceWidth()/4, self.__charset.getSurfaceHeight()/2)
 
-    def draw(self, offsetX : int, offsetY : int):
-        super().draw(offsetX, offsetY)
-
+    def getSprite(self, offsetX : int, offsetY : int) -> Tuple:
         # No need to check if the charset will be offscreen since pygame does it for us
-        self.getWindow().blit(self.__charset.getCurrentSurface(), (self.getPosX() * self.__tileSize - self.__charsetSurfaceOffset[0] + offsetX + self.__movingOffsetX.value * self.__tileSize, self.getPosY() * self.__tileSize - self.__charsetSurfaceOffset[1] + offsetY + self.__movingOffsetY.value * self.__tileSize))
+        return (self.__charset.getCurrentSurface(), (self.getPosX() * self.__tileSize - self.__charsetSurfaceOffset[0] + offsetX + self.__movingOffsetX.getRenderValue() * self.__tileSize, self.getPosY() * self.__tileSize - self.__charsetSurfaceOffset[1] + offsetY + self.__movingOffsetY.getRenderValue() * self.__tileSize))
 
     def isPassThrough(self) -> bool:
         return False
 
+    def getState(self) -> Dict:
+        state = super().getState()
+        state["orientation"] = self.__charset.getOrientation()
+        return state
+
+    def setState(self, state : Dict):
+        super().setState(state)
+        self.__charset.setOrientation(state["orientation"])
+
     def unload(self):
         super().unload()
         self.__charset.unload()
@@ -3,6 +3,7 @@ import typing
 from pypeg2 import *
 
 from engine.graphics.charset import Charset
+from engine.profiler import Profiler
 
 
 class BooleanLiteral(Keyword):
@@ -282,6 +283,7 @@ class CantalInterpreter:
         self.__running = True
         self.processCurrentStatement()
 
+    @Profiler.hook("CantalInterpreter.processCurrentStatement", lambda interpreter: interpreter.getName())
     def processCurrentStatement(self):
         if not self.__running:
             return
@@ -358,9 +360,15 @@ class CantalInterpreter:
         else:
             self.processCurrentStatement()
 
+    def getName(self) -> str:
+        return self.__name
+
     def reset(self):
         self.__blockStack = []
         self.__running = False
 
     def isRunning(self):
-        return self.__running
\ No newline at end of file
+        return self.__running
+
+    def isLoop(self) -> bool:
+        return self.__loop
\ No newline at end of file
@@ -0,0 +1,111 @@
+from typing import List, Tuple
+
+import pygame
+
+
+class Chunk:
+
+    def __init__(self, x : int, y : int, width : int, height : int):
+        self.x = x  # x position of the chunk in the map in tiles
+        self.y = y  # y position of the chunk in the map in tiles
+        self.width = width  # width of the chunk in tiles (can be smaller than the chunk size on the map edges)
+        self.height = height  # height of the chunk in tiles (can be smaller than the chunk size on the map edges)
+
+        self.tiles0 = None  # Tile objects to draw below the actors, row by row - None if the chunk is not loaded
+        self.tiles1 = None  # Tile objects to draw above the actors, row by row (None for the cells without any)
+
+        self.surface0 = None  # baked surface of the tiles below the actors
+        self.surface1 = None  # baked surface of the tiles above the actors - None if there is no tile above the actors and no animated cell
+
+        self.animatedCells = {}  # tile ids of the animated cells -> indices of the cells with these tile ids
+        self.animationFrames = {}  # tile ids of the animated cells -> tile ids of the frame baked in the surfaces
+
+    def isLoaded(self) -> bool:
+        return self.tiles0 is not None
+
+    def setTiles(self, tiles0 : List, tiles1 : List):
+        self.tiles0 = tiles0
+        self.tiles1 = tiles1
+
+    def getTiles(self, x : int, y : int) -> Tuple:
+        # tiles of the given cell of the map, which must be inside the chunk
+        i = (y - self.y) * self.width + (x - self.x)
+        return (self.tiles0[i], self.tiles1[i])
+
+    def addAnimatedCell(self, x : int, y : int, tileIds : Tuple, frameTileIds : Tuple):
+        if tileIds not in self.animatedCells:
+            self.animatedCells[tileIds] = []
+            self.animationFrames[tileIds] = frameTileIds
+
+        self.animatedCells[tileIds].append((y - self.y) * self.width + (x - self.x))
+
+    '''
+    Replaces the tiles of the given cells and redraws them in the baked surfaces
+    cells is a list of (cell index, tile0, tile1)
+    '''
+    def redrawCells(self, cells : List[Tuple], tileSize : int, colorKey : Tuple):
+        # a RLE surface would be decoded and encoded again for each cell, removing the color key decodes it once
+        if self.surface1 is not None and colorKey is not None:
+            self.surface1.set_colorkey(None)
+
+        for index, tile0, tile1 in cells:
+            self.tiles0[index] = tile0
+            self.tiles1[index] = tile1
+
+            rect = ((index % self.width) * tileSize, (index // self.width) * tileSize, tileSize, tileSize)
+
+            # the below tiles are opaque
+            self.surface0.blit(tile0.surface, rect)
+
+            if self.surface1 is not None:
+                self.surface1.fill(colorKey if colorKey is not None else (0, 0, 0, 0), rect)
+
+                if tile1 is not None:
+                    self.surface1.blit(tile1.surface, rect)
+
+        if self.surface1 is not None and colorKey is not None:
+            self.surface1.set_colorkey(colorKey, pygame.RLEACCEL)
+
+    def bake(self, tileSize : int, colorKey : Tuple):
+        size = (self.width * tileSize, self.height * tileSize)
+
+        self.surface0 = pygame.Surface(size).convert()
+
+        # if the tileset has a color key, no drawn pixel can be of that color
+        # so a RLE color keyed surface can be used instead of a much slower per-pixel alpha one
+        if colorKey is not None:
+            surface1 = pygame.Surface(size).convert()
+            surface1.fill(colorKey)
+        else:
+            surface1 = pygame.Surface(size, pygame.SRCALPHA, 32)
+
+        above = False
+
+        for y in range(self.height):
+            for x in range(self.width):
+                position = (x * tileSize, y * tileSize)
+
+                tile0 = self.tiles0[y * self.width + x]
+                if tile0 is not None:
+                    self.surface0.blit(tile0.surface, position)
+
+                tile1 = self.tiles1[y * self.width + x]
+                if tile1 is not None:
+                    surface1.blit(tile1.surface, position)
+                    above = True
+
+        # only keep the above surface if there is something to draw on it, or if an animation may draw on it
+        if not above and len(self.animatedCells) == 0:
+            self.surface1 = None
+        else:
+            if colorKey is not None:
+                surface1.set_colorkey(colorKey, pygame.RLEACCEL)
+            self.surface1 = surface1
+
+    def unload(self):
+        self.tiles0 = None
+        self.tiles1 = None
+        self.surface0 = None
+        self.surface1 = None
+        self.animatedCells = {}
+        self.animationFrames = {}
@@ -0,0 +1,85 @@
+from engine.scene.map.tileset import Tileset
+
+
+class CollisionGrid:
+    '''
+    Collision mask of each cell of a map, one byte per cell, row by row
+    A bit is set for each side the cell cannot be entered from (Tileset.COLLISION_* bits)
+    The cells outside of the map can never be entered
+    '''
+
+    # sides of a cell, and directions of a move
+    UP = Tileset.COLLISION_UP
+    RIGHT = Tileset.COLLISION_RIGHT
+    DOWN = Tileset.COLLISION_DOWN
+    LEFT = Tileset.COLLISION_LEFT
+
+    DIRECTIONS = (UP, RIGHT, DOWN, LEFT)
+
+    # direction -> (dx, dy, side of the next cell the move enters from)
+    MOVES = {
+        UP: (0, -1, DOWN),
+        RIGHT: (1, 0, LEFT),
+        DOWN: (0, 1, UP),
+        LEFT: (-1, 0, RIGHT)
+    }
+
+    def __init__(self, width : int, height : int, cells = None):
+        self.width = width  # in tiles
+        self.height = height  # in tiles
+
+        # copied, so that the grid outlives the buffer it was built from (the mapped compiled map file)
+        self.__cells = bytearray(cells) if cells is not None else bytearray(width * height)
+
+        if len(self.__cells) != width * height:
+            raise Exception("The collision grid size does not match the map size")
+
+    def isInside(self, x : int, y : int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def getMask(self, x : int, y : int) -> int:
+        return self.__cells[y * self.width + x]
+
+    def setMask(self, x : int, y : int, mask : int):
+        self.__cells[y * self.width + x] = mask
+
+    '''
+    Can the cell be entered from the given side ?
+    '''
+    def canEnter(self, x : int, y : int, side : int) -> bool:
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+
+        return self.__cells[y * self.width + x] & side == 0
+
+    '''
+    Can an actor on the given cell move in the given direction ?
+    '''
+    def canMove(self, x : int, y : int, direction : int) -> bool:
+        dx, dy, side = CollisionGrid.MOVES[direction]
+        return self.canEnter(x + dx, y + dy, side)
+
+    '''
+    Returns the directions an actor on the given cell can move in, as a mask of CollisionGrid.DIRECTIONS bits
+    '''
+    def getNeighboursMask(self, x : int, y : int) -> int:
+        mask = 0
+        for direction in CollisionGrid.DIRECTIONS:
+            if self.canMove(x, y, direction):
+                mask |= direction
+
+        return mask
+
+    '''
+    Are all the cells of the region inside of the map and free of any collision ?
+    '''
+    def isRegionPassable(self, x : int, y : int, width : int, height : int) -> bool:
+        if x < 0 or y < 0 or x + width > self.width or y + height > self.height:
+            return False
+
+        for row in range(y, y + height):
+            start = row * self.width + x
+            if self.__cells.count(0, start, start + width) != width:
+                return False
+
+        return True
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from typing import List
+
+
+class CachedMap:
+    '''
+    Data of an unloaded map kept to restore it quickly : its baked chunks, tiles, collision grid and actors definitions
+    The actors are not kept, only their state
+    '''
+
+    def __init__(self):
+        self.metadata = None  # the map metadata
+        self.width = 0  # in tiles
+        self.height = 0  # in tiles
+        self.tileSize = 0  # in px
+        self.tileset = None  # the Tileset of the map
+        self.mapData = None  # the MapData of the map, only kept open for the streaming maps
+
+        self.tilesCache = {}  # tuple of tile ids -> (tile0, tile1)
+        self.chunksMatrix = []  # matrix of Chunk objects, only the loaded ones have tiles and surfaces
+        self.collisionGrid = None
+
+        self.actorsDefinitions = []  # actors of the map as defined in its actors file
+        self.actorsStates = {}  # definition index -> state of the actor
+        self.chunksActors = {}  # (chunk x, chunk y) -> definitions indices of the actors loaded with the chunk
+        self.actorsChunks = {}  # definition index -> (chunk x, chunk y) the actor is loaded with
+
+    '''
+    Returns the estimated size in bytes of the surfaces of the map
+    '''
+    def getSize(self) -> int:
+        surfaces = []
+
+        for chunksRow in self.chunksMatrix:
+            for chunk in chunksRow:
+                surfaces += [chunk.surface0, chunk.surface1]
+
+        for tile0, tile1 in self.tilesCache.values():
+            surfaces += [tile0.surface, tile1.surface if tile1 is not None else None]
+
+        return sum(surface.get_pitch() * surface.get_height() for surface in surfaces if surface is not None)
+
+    def close(self):
+        for chunksRow in self.chunksMatrix:
+            for chunk in chunksRow:
+                chunk.unload()
+
+        self.chunksMatrix = []
+        self.tilesCache = {}
+
+        if self.mapData is not None:
+            self.mapData.close()
+            self.mapData = None
+
+
+class MapCache:
+    '''
+    Recently unloaded maps, so that going back to a map does not build its tiles and chunks again
+    The least recently unloaded maps are evicted once the cache is over its memory budget
+    '''
+
+    ENABLED = True
+    MEMORY_BUDGET = 32 * 1024 * 1024  # bytes of cached surfaces above which the least recently unloaded maps are evicted
+
+    __maps = OrderedDict()  # map name -> CachedMap, least recently unloaded first
+    __sizes = {}  # map name -> estimated size in bytes
+    __usedMemory = 0  # estimated size in bytes of the cached maps
+
+    '''
+    Adds an unloaded map to the cache, evicting the oldest maps if needed
+    '''
+    @staticmethod
+    def put(name : str, cachedMap : CachedMap):
+        MapCache.drop(name)
+
+        size = cachedMap.getSize()
+
+        if not MapCache.ENABLED or size > MapCache.MEMORY_BUDGET:
+            cachedMap.close()
+            return
+
+        MapCache.evict(MapCache.MEMORY_BUDGET - size)
+
+        MapCache.__maps[name] = cachedMap
+        MapCache.__sizes[name] = size
+        MapCache.__usedMemory += size
+
+        print("     Cached map " + name + " (" + str(int(size / 1024)) + " KB, " + str(int(MapCache.__usedMemory / 1024)) + " KB used)")
+
+    '''
+    Returns the cached map without removing it from the cache, None if it is not cached
+    '''
+    @staticmethod
+    def get(name : str) -> CachedMap:
+        return MapCache.__maps.get(name)
+
+    '''
+    Removes the map from the cache and returns it, None if it is not cached
+    '''
+    @staticmethod
+    def take(name : str) -> CachedMap:
+        if name not in MapCache.__maps:
+            return None
+
+        MapCache.__usedMemory -= MapCache.__sizes.pop(name)
+        return MapCache.__maps.pop(name)
+
+    @staticmethod
+    def drop(name : str):
+        cachedMap = MapCache.take(name)
+
+        if cachedMap is not None:
+            cachedMap.close()
+
+    '''
+    Evicts the least recently unloaded maps until the used memory is under the given size in bytes
+    '''
+    @staticmethod
+    def evict(size : int):
+        for name in list(MapCache.__maps):
+            if MapCache.__usedMemory <= size:
+                break
+
+            MapCache.drop(name)
+
+    @staticmethod
+    def getUsedMemory() -> int:
+        return MapCache.__usedMemory
+
+    @staticmethod
+    def getCachedMaps() -> List[str]:
+        return list(MapCache.__maps)
+
+    @staticmethod
+    def unload():
+        for name in list(MapCache.__maps):
+            MapCache.drop(name)
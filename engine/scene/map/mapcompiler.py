@@ -0,0 +1,37 @@
+import glob
+import os
+import sys
+from typing import List
+
+from data.constants import Constants
+from engine.scene.map.mapdata import MapData
+from engine.scene.map.tileset import Tileset
+
+
+class MapCompiler:
+    '''
+    Compiles the Tiled JSON maps into the binary format loaded by MapData
+    '''
+
+    @staticmethod
+    def compile(mapName : str):
+        mapData = MapData.fromJson(mapName)
+        path = MapData.getCompiledPath(mapName)
+
+        mapData.save(path, os.path.getmtime(MapData.getJsonPath(mapName)), os.path.getmtime(Tileset.getPath(mapData.tilesetName)))
+
+        print("Compiled " + mapName + " (" + str(os.path.getsize(MapData.getJsonPath(mapName))) + " B -> " + str(os.path.getsize(path)) + " B)")
+
+    @staticmethod
+    def getMapsNames() -> List[str]:
+        size = len(Constants.MAPS_PATH) + 1
+        return [f[size:-5] for f in glob.iglob(os.path.join(Constants.MAPS_PATH, "*.json"))]
+
+
+if __name__ == '__main__':
+    # compiles the given maps, or all of them
+    for name in (sys.argv[1:] if len(sys.argv) > 1 else MapCompiler.getMapsNames()):
+        try:
+            MapCompiler.compile(name)
+        except Exception as e:
+            print("Couldn't compile " + name + " (" + str(e) + ")")
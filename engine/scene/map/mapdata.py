@@ -0,0 +1,211 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import List, Tuple
+
+from data.constants import Constants
+from engine.scene.map.tileset import Tileset
+
+
+class MapData:
+    '''
+    Tiles of a map : tile ids of each layer, and the collision mask of each cell
+    Loaded from the compiled map file when it is up to date, from the Tiled JSON otherwise
+
+    Compiled map file layout (little endian) :
+        header
+        uint16 tile ids of each layer, row by row (0 is an empty cell, as in Tiled)
+        uint8 collision mask of each cell (Tileset.COLLISION_* bits)
+    '''
+
+    MAGIC = b"PKMP"
+    VERSION = 2
+
+    TILESET_NAME_SIZE = 32  # bytes of the UTF-8 tileset name in the header
+
+    # magic, version, width, height, tile size, layers count, tileset name, map JSON mtime, tileset JSON mtime
+    HEADER = struct.Struct("<4sHHHHH%dsdd" % TILESET_NAME_SIZE)
+
+    AUTO_COMPILE = True  # compile the maps loaded from JSON so that the next loads are faster
+
+    def __init__(self, width : int, height : int, tileSize : int, tilesetName : str, layers : List, collision, buffer : mmap.mmap = None):
+        self.width = width  # in tiles
+        self.height = height  # in tiles
+        self.tileSize = tileSize  # in px
+        self.tilesetName = tilesetName
+
+        self.layers = layers  # uint16 tile ids of each layer, row by row
+        self.collision = collision  # uint8 collision mask of each cell, row by row
+
+        self.__buffer = buffer  # the mapped file the arrays are views of, None if loaded from JSON
+
+    def getTileIds(self, x : int, y : int) -> Tuple:
+        # ids in the tileset of the tiles of the cell, from the lowest layer
+        i = y * self.width + x
+        return tuple(layer[i] - 1 for layer in self.layers if layer[i] != 0)
+
+    def getCollision(self, x : int, y : int) -> int:
+        return self.collision[y * self.width + x]
+
+    def close(self):
+        self.layers = []
+        self.collision = None
+
+        if self.__buffer is not None:
+            # views still used elsewhere keep the file mapped until they are released
+            try:
+                self.__buffer.close()
+            except BufferError:
+                pass
+            self.__buffer = None
+
+    @staticmethod
+    def getJsonPath(mapName : str) -> str:
+        return os.path.join(Constants.MAPS_PATH, mapName + ".json")
+
+    @staticmethod
+    def getCompiledPath(mapName : str) -> str:
+        return os.path.join(Constants.COMPILED_MAPS_PATH, mapName + ".map")
+
+    '''
+    Loads the compiled map if it is up to date, the JSON map otherwise
+    '''
+    @staticmethod
+    def load(mapName : str) -> 'MapData':
+        compiledPath = MapData.getCompiledPath(mapName)
+
+        if os.path.exists(compiledPath):
+            mapData = MapData.fromFile(compiledPath)
+
+            if mapData is not None and MapData.isUpToDate(mapName, compiledPath):
+                return mapData
+
+            if mapData is not None:
+                mapData.close()
+            print("     Compiled map is out of date, loading the JSON map")
+
+        mapData = MapData.fromJson(mapName)
+
+        if MapData.AUTO_COMPILE:
+            mapData.save(compiledPath, os.path.getmtime(MapData.getJsonPath(mapName)), os.path.getmtime(Tileset.getPath(mapData.tilesetName)))
+
+        return mapData
+
+    @staticmethod
+    def readHeader(buffer) -> Tuple:
+        magic, version, width, height, tileSize, layersCount, tilesetName, mapMtime, tilesetMtime = MapData.HEADER.unpack_from(buffer)
+        return magic, version, width, height, tileSize, layersCount, tilesetName.rstrip(b"\0").decode("utf-8"), mapMtime, tilesetMtime
+
+    @staticmethod
+    def isUpToDate(mapName : str, compiledPath : str) -> bool:
+        with open(compiledPath, "rb") as f:
+            _, _, _, _, _, _, tilesetName, mapMtime, tilesetMtime = MapData.readHeader(f.read(MapData.HEADER.size))
+
+        tilesetPath = Tileset.getPath(tilesetName)
+        return os.path.getmtime(MapData.getJsonPath(mapName)) == mapMtime and os.path.exists(tilesetPath) and os.path.getmtime(tilesetPath) == tilesetMtime
+
+    '''
+    Maps a compiled map file, the arrays are views of the mapped file
+    Returns None if the file is not a compiled map of this version
+    '''
+    @staticmethod
+    def fromFile(path : str) -> 'MapData':
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(buffer) < MapData.HEADER.size:
+            buffer.close()
+            return None
+
+        magic, version, width, height, tileSize, layersCount, tilesetName, _, _ = MapData.readHeader(buffer)
+        if magic != MapData.MAGIC or version != MapData.VERSION:
+            buffer.close()
+            return None
+
+        cellsCount = width * height
+        view = memoryview(buffer)
+        offset = MapData.HEADER.size
+
+        layers = []
+        for i in range(layersCount):
+            layer = view[offset:offset + cellsCount * 2]
+            layers.append(layer.cast("H") if sys.byteorder == "little" else MapData.swapBytes(layer))
+            offset += cellsCount * 2
+
+        collision = view[offset:offset + cellsCount]
+
+        return MapData(width, height, tileSize, tilesetName, layers, collision, buffer)
+
+    @staticmethod
+    def swapBytes(layer : memoryview) -> array:
+        swapped = array("H", layer.tobytes())
+        swapped.byteswap()
+        return swapped
+
+    '''
+    Parses the Tiled JSON map and computes the collision mask of the cells from its tileset
+    '''
+    @staticmethod
+    def fromJson(mapName : str) -> 'MapData':
+        with open(MapData.getJsonPath(mapName), "r") as f:
+            mapJson = json.loads(f.read())
+
+        if mapJson["tilewidth"] != mapJson["tileheight"]:
+            raise Exception("The tile width and height must not be different")
+
+        width = mapJson["width"]
+        height = mapJson["height"]
+        tilesetName = mapJson["tilesets"][0]["source"][21:-4]
+
+        tileset = Tileset.get(tilesetName)
+
+        layers = [array("H", layer["data"]) for layer in mapJson["layers"]]
+
+        # Collision of the cells
+        cellsCount = width * height
+        collision = bytearray(cellsCount)
+
+        for i in range(cellsCount):
+            for layer in layers:
+                if layer[i] == 0:
+                    continue
+
+                tileId = layer[i] - 1
+
+                # the tiles after an above one are above too, and only the tiles below collide
+                if tileset.above[tileId]:
+                    break
+
+                collision[i] |= tileset.getCollision(tileId)
+
+        return MapData(width, height, mapJson["tilewidth"], tilesetName, layers, collision)
+
+    '''
+    Writes the compiled map file
+    '''
+    def save(self, path : str, mapMtime : float, tilesetMtime : float):
+        # the header name would be silently truncated
+        tilesetName = self.tilesetName.encode("utf-8")
+        if len(tilesetName) > MapData.TILESET_NAME_SIZE:
+            raise Exception("The tileset name " + self.tilesetName + " is too long to compile the map (" + str(MapData.TILESET_NAME_SIZE) + " bytes max)")
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        header = MapData.HEADER.pack(MapData.MAGIC, MapData.VERSION, self.width, self.height, self.tileSize, len(self.layers), tilesetName, mapMtime, tilesetMtime)
+
+        # written to a temporary file first so that an interrupted write never leaves a truncated map
+        with open(path + ".tmp", "wb") as f:
+            f.write(header)
+
+            for layer in self.layers:
+                layer = array("H", layer)
+                if sys.byteorder != "little":
+                    layer.byteswap()
+                f.write(layer.tobytes())
+
+            f.write(bytes(self.collision))
+
+        os.replace(path + ".tmp", path)
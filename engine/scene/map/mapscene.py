@@ -1,22 +1,32 @@
 import importlib
 import math
-from typing import Tuple, List, Callable, Dict
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from typing import Tuple, List, Callable, Dict, Iterator
 
 import pygame
 
 from data.constants import Constants
+from engine.animationclock import AnimationClock
+from engine.assetloader import AssetLoader
 from engine.graphics.dialogrenderer import DialogRenderer
 
 from engine.graphics.frame import Frame
 from engine.graphics.textures import Textures, Engine
 from engine.graphics.charset import Charset
+from engine.input import Input
 from engine.scene.map.actors.actor import Actor
+from engine.scene.map.chunk import Chunk
+from engine.scene.map.collisiongrid import CollisionGrid
+from engine.scene.map.mapcache import MapCache, CachedMap
+from engine.scene.map.mapdata import MapData
 from engine.scene.map.tile import Tile
+from engine.scene.map.tileset import Tileset
 from engine.scene.scene import Scene
 import os
 import json
 
 from engine.sound.sfx import SFX
+from engine.strings import Strings
 from engine.timer import Timer
 from engine.tween.easing import Easing
 from engine.tween.tween import Tween
@@ -28,6 +38,34 @@ class MapScene(Scene):
     CAMERA_MOVEMENT_DURATION = 200
     STEP_DURATION = 100
 
+    ACTORS_DRAW_MARGIN = 3  # actors this many tiles outside of the camera are still drawn (charsets overflow their tile, walking NPCs are drawn away from it)
+
+    CHUNK_SIZE = 16  # size of the side of a chunk in tiles
+    CHUNKED_RENDERING = True  # if True, draw the pre-baked chunks instead of blitting every tile
+
+    # if True, only the chunks around the camera and their actors are loaded, for the maps too big to be loaded at once
+    # the map metadata "streaming" flag overrides it
+    STREAMING = False
+    STREAMING_LOAD_MARGIN = 8  # chunks this many tiles outside of the camera are loaded
+    STREAMING_UNLOAD_MARGIN = 24  # chunks further than this many tiles from the camera are unloaded - more than the load margin, so that walking back and forth does not reload the same chunks
+
+    # edge of the map -> (direction of the move crossing it, side of the connected map cell entered)
+    CONNECTIONS_EDGES = {
+        "up": (CollisionGrid.UP, CollisionGrid.DOWN),
+        "right": (CollisionGrid.RIGHT, CollisionGrid.LEFT),
+        "down": (CollisionGrid.DOWN, CollisionGrid.UP),
+        "left": (CollisionGrid.LEFT, CollisionGrid.RIGHT)
+    }
+    CONNECTIONS_PREFETCH_DISTANCE = 8  # the connected map is prepared by the worker when the character is this many tiles from its edge
+
+    CHARACTER_CHARSET = "charsets.character"
+    SFX_MANIFEST = ["bump"]  # SFXs preloaded by every map, the map metadata "sfx" list adds its own
+
+    LOADING_POLL_INTERVAL = 1  # ms waited at each loading step while the worker prepares the map assets
+
+    __prefetchWorker = None  # thread preparing the connected maps and the maps loaded in steps
+    __preparedMaps = {}  # map name -> Future of the assets prepared by the worker
+
     def __init__(self, engine : Engine, map : str, spawnPosition : Tuple):
         super().__init__(engine)
 
@@ -44,14 +82,36 @@ class MapScene(Scene):
         self.__windowWidth = 0  # width of the window in tiles (depends on tileSize)
         self.__windowHeight = 0  # height of the window in tiles (depends on tileSize)
 
-        self.__tilesMatrix0 = []  # matrix of Tile objects to draw below the actors
-        self.__tilesMatrix1 = []  # matrix of Tile objects surfaces to draw above the actors
+        self.__tileset = None  # the Tileset of the map
+        self.__mapData = None  # the MapData of the map, kept while streaming to load the chunks
+        self.__tilesCache = {}  # tuple of tile ids -> (tile0, tile1), cells with the same stack of tile ids share the same Tile objects
+
+        self.__chunksMatrix = []  # matrix of Chunk objects, each one has the tiles of its cells and their baked surfaces
+
+        self.__animationFrames = {}  # animated tile id -> tile id of its current frame
+        self.__animatedCells = {}  # tile ids of the animated cells -> tile ids of their current frame
+        self.__nextAnimationFrame = 0  # animation clock time of the next frame change of the animated tiles
+        self.__animationsDirtyCells = set()  # (x, y) of the cells redrawn by refreshAnimations() since the last dirty rects
+
+        self.__metadata = None  # the map metadata
+
+        self.__connections = {}  # edge -> {"map": connected map name, "offset": position of the connected map along the edge in tiles}
+        self.__connectedScenes = {}  # edge -> MapScene of the connected map, loaded in the background once the character is close to the edge
+
+        self.__background = False  # is the map loaded in the background as a connected map ? it becomes the current one when the character enters it
+        self.__loaded = False  # are all the loading steps done ?
+
+        self.__streaming = MapScene.STREAMING  # are the chunks loaded around the camera only ?
+        self.__streamingWindow = None  # (first x, first y, last x, last y) of the chunks loaded around the camera
+        self.__loadedChunks = set()  # the loaded chunks, while streaming
+
+        self.__collisionGrid = None  # the CollisionGrid of the map
 
         self.__inputsLocks = 0  # number of times the inputs have been locked - inputs are blocked if this is > 0
 
         self.__window = self.getEngine().getWindow()  # the game window
 
-        self.__characterCharset = Charset.ofTexture("charsets.character", Charset.ORIENTATION_DOWN)   # character charset
+        self.__characterCharset = Charset.ofTexture(MapScene.CHARACTER_CHARSET, Charset.ORIENTATION_DOWN)   # character charset
         self.__characterCharsetOffsetX = 0  # quarter the width of the step texture
         self.__characterCharsetOffsetY = 0  # half the height of the step texture
 
@@ -61,7 +121,7 @@ class MapScene(Scene):
         self.__characterX = spawnPosition[0] # x position of the character in tiles
         self.__characterY = spawnPosition[1]  # y position of the character in tiles
 
-        # TODO Initialize this properly / be able to (1) spawn player at any given position AND (2) place camera accordingly
+        # the camera is moved when loading if the character is not on the first screen
         self.__characterXOnScreen = self.__characterX # x position on screen of the character in tiles
         self.__characterYOnScreen = self.__characterY  # y position on screen of the character in tiles
 
@@ -87,16 +147,26 @@ class MapScene(Scene):
         self.__mapOffsetX = 0
         self.__mapOffsetY = 0
 
-        self.actorsMatrix = []  # actors matrix
+        self.__actorsRows = {}  # spatial index of the actors : row -> {column -> actor}, only contains the non empty rows
         self.actorsByName = {}  # actors by name
 
+        self.__actorsDefinitions = []  # actors of the map as defined in its actors file
+        self.__actorsInstances = {}  # definition index -> Actor, for the loaded actors
+        self.__actorsStates = {}  # definition index -> state of the unloaded actors, restored when they are loaded again
+        self.__chunksActors = {}  # (chunk x, chunk y) -> definitions indices of the actors loaded with the chunk
+        self.__actorsChunks = {}  # definition index -> (chunk x, chunk y) the actor is loaded with
+        self.__actorModules = {}  # actor type -> module
+
         self.__touchEventProcessed = False  # used to prevent touch events spamming
 
         self.__bumpPlayed = False  # used to delay bump sounds
         self.__bumpTimer = None
 
-        self.__dt = 0  # delta-time given by pygame clock
-        self.__events = None  # pygame events
+        self.__lastCamera = None  # camera position of the last getDirtyRects() call
+        self.__lastSprites = None  # sprites of the last getDirtyRects() call
+        self.__dialogShown = False  # was a dialog shown during the last getDirtyRects() call ?
+
+        self.__blitsCount = 0  # number of blits made by the last draw()
 
         dialogHeight = int((1/3) * self.getEngine().getResolution()[1])
         self.__dialogBoundaries = (0, self.getEngine().getResolution()[1] - dialogHeight, self.getEngine().getResolution()[0], dialogHeight)
@@ -110,6 +180,9 @@ class MapScene(Scene):
     def getTileSize(self) -> int:
         return self.__tileSize
 
+    def getCollisionGrid(self) -> CollisionGrid:
+        return self.__collisionGrid
+
     def showDialog(self, text : str, cb : Callable, payload : Dict):
         if self.__dialogRenderer is not None:
             return
@@ -139,32 +212,68 @@ class MapScene(Scene):
     def getMapName(self) -> str:
         return self.__mapName
 
+    def getMapSize(self) -> Tuple:
+        return (self.__mapWidth, self.__mapHeight)
+
+    def setCharacterOrientation(self, orientation : int):
+        self.__characterCharset.setOrientation(orientation)
+
     def load(self):
+        # all the steps at once
+        for _ in self.loadSteps():
+            pass
+
+    '''
+    Loads the map in steps : decoding the assets on the worker, finishing them, baking each chunk and spawning each actor
+    '''
+    def loadSteps(self) -> Iterator:
         super().load()
 
         print("Loading map " + self.__mapName + "...")
 
-        # Load map metadata
-        mapMetaData = None
-        with open(os.path.join(Constants.MAPS_METADATA_PATH, self.__mapName + ".json")) as f:
-            mapMetaData = json.loads(f.read())
+        # Restore the map from the cache if it was visited recently
+        # otherwise let the worker read and decode its assets, unless it already did it
+        cachedMap = MapCache.take(self.__mapName)
 
-        # Play BGM
-        if "bgm" in mapMetaData:
-            self.getEngine().playBGM(mapMetaData["bgm"])
+        if cachedMap is None:
+            future = MapScene.prefetchMap(self.__mapName)
+
+            while not future.done():
+                wait([future], timeout=MapScene.LOADING_POLL_INTERVAL / 1000)
+                yield
+
+        if cachedMap is not None:
+            print("     Restoring map from the cache")
 
-        # Load the map data
-        mapData = None
+            mapMetaData = cachedMap.metadata
+            tilesetLoader = MapScene.prepareTilesetAssets(self.__mapName, mapMetaData, cachedMap.tileset.name, cachedMap.actorsDefinitions)
+            mapData = cachedMap.mapData
+            actorsData = None
+            mapSize = (cachedMap.width, cachedMap.height, cachedMap.tileSize, cachedMap.tileset.name)
+        else:
+            mapLoader, tilesetLoader, _ = MapScene.takePreparedAssets(self.__mapName)
+
+            assets = mapLoader.finish()
 
-        with open(os.path.join(Constants.MAPS_PATH, self.__mapName + ".json"), "r") as f:
-            mapData = json.loads(f.read())
+            mapMetaData = assets["metadata"]
+            mapData = assets["map"]
+            actorsData = assets["actors"]
+            mapSize = (mapData.width, mapData.height, mapData.tileSize, mapData.tilesetName)
 
-        if mapData["tilewidth"] != mapData["tileheight"]:
-            raise Exception("The tile width and height must not be different")
+        self.__metadata = mapMetaData
 
-        self.__mapWidth = mapData["width"]
-        self.__mapHeight = mapData["height"]
-        self.__tileSize = mapData["tilewidth"]
+        # Play BGM, the connected maps play theirs when the character enters them
+        if "bgm" in mapMetaData and not self.__background:
+            self.getEngine().playBGM(mapMetaData["bgm"])
+
+        self.__streaming = mapMetaData.get("streaming", MapScene.STREAMING)
+        self.__connections = mapMetaData.get("connections", {})
+
+        for edge in self.__connections:
+            if edge not in MapScene.CONNECTIONS_EDGES:
+                raise Exception("Unknown map connection edge " + edge)
+
+        self.__mapWidth, self.__mapHeight, self.__tileSize, self.__tilesetName = mapSize
 
         print("     Map size in tiles : " + str(self.__mapWidth) + "*" + str(self.__mapHeight))
         print("     Tile size in px : " + str(self.__tileSize))
@@ -200,165 +309,623 @@ class MapScene(Scene):
 
         print("     Camera scroll boundaries : x : " + str(self.__cameraMovementRectX) + ", y :" + str(self.__cameraMovementRectY))
 
-        # Load tileset texture
-        self.__tilesetName = mapData["tilesets"][0]["source"][21:-4]
+        self.moveCameraToCharacter()
+
+        yield
 
+        # Load tileset texture
         print("     Tileset name : " + self.__tilesetName)
 
-        self.__tilesetTexture = Textures.getTexture("tilesets." + self.__tilesetName)
+        tileset = tilesetLoader.finish()["tileset"]
+
+        if tileset.tileSize != self.__tileSize:
+            raise Exception("The map and tileset tile sizes must be the same")
+
+        self.__tilesetTexture = self.acquireTexture("tilesets." + self.__tilesetName)
 
         # Load player charset
         self.__characterCharset.load()
         self.__characterCharsetOffsetX = int(self.__characterCharset.getSurfaceWidth() / 4)
         self.__characterCharsetOffsetY = int(self.__characterCharset.getSurfaceHeight() / 2)
 
-        # Load tileset data
-        tilesetData = None
+        self.__tileset = tileset
+        self.__mapData = mapData
+
+        self.updateAnimations()
 
-        with open(os.path.join(Constants.TILESETS_PATH, self.__tilesetName + ".json"), "r") as f:
-            tilesetData = json.loads(f.read())
+        yield
 
-        layersCount = len(mapData["layers"])
+        if cachedMap is not None:
+            self.restoreCachedMap(cachedMap)
+        else:
+            print("     Layers count : " + str(len(mapData.layers)))
 
-        print("     Layers count : " + str(layersCount))
+            self.__collisionGrid = CollisionGrid(self.__mapWidth, self.__mapHeight, mapData.collision)
 
-        # Get list of texture coords
-        tileIdToTextureCoords = {}
-        tileCount = 0
-        for y in range(int(tilesetData["imageheight"] / self.__tileSize)):
-            for x in range(int(tilesetData["imagewidth"] / self.__tileSize)):
-                tileIdToTextureCoords[tileCount] = (x * self.__tileSize,
-                                                    y * self.__tileSize,
-                                                    self.__tileSize,
-                                                    self.__tileSize)
-                tileCount += 1
+            self.createChunks()
 
-        # Create tiles cache
-        tileCount = 0
+            self.loadActorsDefinitions(actorsData)
 
-        # For each tile
-        for y in range(self.__mapHeight):
-            self.__tilesMatrix0.append([])
-            self.__tilesMatrix1.append([])
-            for x in range(self.__mapWidth):
-                self.__tilesMatrix0[y].append([])
-                self.__tilesMatrix1[y].append([])
+        yield
 
-                # Tile data allocation
-                tile0 = Tile()
-                tile0.surface = pygame.Surface([self.__tileSize, self.__tileSize])
+        if self.__streaming:
+            # Load the chunks around the camera and their actors, the other ones are loaded when the camera gets close
+            self.updateStreaming()
 
-                self.__tilesMatrix0[y][x] = tile0
+            # the actors of the chunks restored from the cache
+            for chunk in self.__loadedChunks:
+                self.loadChunkActors(chunk.x // MapScene.CHUNK_SIZE, chunk.y // MapScene.CHUNK_SIZE)
+        else:
+            # Load all the chunks, then spawn all the actors
+            if cachedMap is None:
+                for chunksRow in self.__chunksMatrix:
+                    for chunk in chunksRow:
+                        self.loadChunk(chunk)
+                        yield
 
-                tile1 = Tile()
-                tile1.surface = pygame.Surface([self.__tileSize, self.__tileSize], pygame.SRCALPHA, 32)
-                self.__tilesMatrix1[y][x] = tile1
+                mapData.close()
+                self.__mapData = None
 
-                above = False
+            for index in range(len(self.__actorsDefinitions)):
+                self.loadActor(index)
+                yield
 
-                # For each layer
-                for lId in range(layersCount):
-                    layer = mapData["layers"][lId]
+        # the chunks restored from the cache were drawn with older animation frames
+        self.refreshAnimations()
 
-                    tileId = layer["data"][tileCount]
+        # Tiles memory stats
+        cellsCount = sum(chunk.width * chunk.height for chunksRow in self.__chunksMatrix for chunk in chunksRow if chunk.isLoaded())
+        uniqueCellsCount = len(self.__tilesCache)
 
-                    if tileId == 0:
-                        continue
+        tile0Bytes = self.__tileSize * self.__tileSize * pygame.Surface([self.__tileSize, self.__tileSize]).get_bytesize()
+        tile1Bytes = self.__tileSize * self.__tileSize * 4
+        uniqueTiles1Count = len([t for t in self.__tilesCache.values() if t[1] is not None])
 
-                    tileId -= 1
-                    tileCoords = tileIdToTextureCoords[tileId]
+        # one tile0 per cell and one tile1 per cell above the actors without the sharing
+        aboveCellsCount = sum(1 for chunksRow in self.__chunksMatrix for chunk in chunksRow if chunk.isLoaded() for tile1 in chunk.tiles1 if tile1 is not None)
 
-                    strTileId = str(tileId)
+        usedBytes = uniqueCellsCount * tile0Bytes + uniqueTiles1Count * tile1Bytes
+        savedBytes = cellsCount * tile0Bytes + aboveCellsCount * tile1Bytes - usedBytes
 
-                    # if there is at least one tile which is above the actors
-                    # all the subsequent tiles will be above, regardless of the layer
-                    if strTileId in tilesetData["tiles"] and tilesetData["tiles"][strTileId]["type"] == Tile.TYPE_ABOVE_ACTORS:
-                        above = True
+        print("     Unique cells : " + str(uniqueCellsCount) + " / " + str(cellsCount) + " (" + str(int(usedBytes / 1024)) + " KB used, " + str(int(savedBytes / 1024)) + " KB saved)")
 
-                    # Blit on the correct tile
-                    if above:
-                        tile = self.__tilesMatrix1[y][x]
-                    else:
-                        tile = self.__tilesMatrix0[y][x]
-
-                    tile.surface.blit(self.__tilesetTexture, (0, 0), tileCoords)
-
-                    # Collision flags
-                    if strTileId in tilesetData["tileproperties"]:
-                        tileProperties = tilesetData["tileproperties"][strTileId]
-                        if "collision" in tileProperties:
-                            collisionStr = tileProperties["collision"]
-
-                            if len(collisionStr) > 0:
-                                for flag in collisionStr.split(";"):
-                                    if flag == "up":
-                                        tile.collision = (True, tile.collision[1], tile.collision[2], tile.collision[3])
-                                    elif flag == "right":
-                                        tile.collision = (tile.collision[0], True, tile.collision[2], tile.collision[3])
-                                    elif flag == "down":
-                                        tile.collision = (tile.collision[0], tile.collision[1], True, tile.collision[3])
-                                    elif flag == "left":
-                                        tile.collision = (tile.collision[0], tile.collision[1], tile.collision[2], True)
-                                    else:
-                                        raise Exception("Unknown collision parameter : " + flag)
-
-                # if there was no tile drawn on the above layer, discard the tile
-                if not above:
-                    self.__tilesMatrix1[y][x] = None
-
-                tileCount += 1
-
-        # Load and spawn actors
-        for y in range(self.__mapHeight):
-            self.actorsMatrix.append([])
-            for x in range(self.__mapWidth):
-                self.actorsMatrix[y].append([])
-                self.actorsMatrix[y][x] = None
+        self.__loaded = True
 
+        # Load the connected maps if the character is close to them, once it enters this one if it is a connected map itself
+        if not self.__background:
+            self.updateConnections()
+
+        print("Done loading map")
+
+    '''
+    Reads and decodes the assets of a map, returns the loader batches to finish on the main thread and the map data
+    Can be run by a worker thread to prepare a connected map before the character crosses into it
+    '''
+    @staticmethod
+    def prepareAssets(mapName : str) -> Tuple[AssetLoader, AssetLoader, MapData]:
+        # Map metadata, data and actors
+        mapLoader = AssetLoader("map")
+        mapLoader.addJson("metadata", os.path.join(Constants.MAPS_METADATA_PATH, mapName + ".json"))
+        mapLoader.add("map", lambda: MapData.load(mapName))
+        mapLoader.add("actors", lambda: MapScene.readActorsFile(mapName))
+        assets = mapLoader.decode()
+
+        mapData = assets["map"]
+        tilesetLoader = MapScene.prepareTilesetAssets(mapName, assets["metadata"], mapData.tilesetName, assets["actors"])
+
+        return (mapLoader, tilesetLoader, mapData)
+
+    '''
+    Reads and decodes the tileset data, the map strings, the tileset and character textures, the SFXs and the actors scripts
+    Returns the loader batch to finish on the main thread
+    '''
+    @staticmethod
+    def prepareTilesetAssets(mapName : str, metadata : Dict, tilesetName : str, actorsData : List) -> AssetLoader:
+        tilesetLoader = AssetLoader("tileset")
+        tilesetLoader.add("tileset", lambda: Tileset.get(tilesetName))
+        Textures.preload(["tilesets." + tilesetName, MapScene.CHARACTER_CHARSET], tilesetLoader)
+        SFX.preload(MapScene.SFX_MANIFEST + metadata.get("sfx", []), tilesetLoader)
+        Strings.preload(["maps." + mapName], tilesetLoader)
+
+        for script in set(actor["script"] for actor in (actorsData or []) if actor.get("script") is not None):
+            tilesetLoader.add("scripts." + script, lambda script=script: MapScene.parseScript(mapName, script))
+
+        tilesetLoader.decode()
+
+        return tilesetLoader
+
+    @staticmethod
+    def readActorsFile(mapName : str) -> List:
+        # None if the map has no actors
+        try:
+            with open(os.path.join(Constants.ACTORS_PATH, mapName, "actors.json"), "r") as f:
+                return json.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def parseScript(mapName : str, script : str):
+        # missing scripts are reported when loading the actor using them
         try:
+            return Actor.loadScript(mapName, script)
+        except FileNotFoundError:
+            return None
+
+    '''
+    Starts preparing the assets of a map on the worker thread, returns the Future of the assets
+    '''
+    @staticmethod
+    def prefetchMap(mapName : str) -> Future:
+        if mapName in MapScene.__preparedMaps:
+            return MapScene.__preparedMaps[mapName]
+
+        if MapScene.__prefetchWorker is None:
+            MapScene.__prefetchWorker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MapPrefetch")
+
+        print("Preparing map " + mapName + " on the worker")
+
+        MapScene.__preparedMaps[mapName] = MapScene.__prefetchWorker.submit(MapScene.prepareAssets, mapName)
+
+        return MapScene.__preparedMaps[mapName]
+
+    '''
+    Returns the assets prepared by the worker for the given map and forgets them, waiting for the worker if needed
+    The assets are prepared now if the map was not prefetched
+    '''
+    @staticmethod
+    def takePreparedAssets(mapName : str) -> Tuple[AssetLoader, AssetLoader, MapData]:
+        future = MapScene.__preparedMaps.pop(mapName, None)
+
+        if future is None:
+            return MapScene.prepareAssets(mapName)
+
+        return future.result()
+
+    '''
+    Forgets the assets prepared for a map whose loading was cancelled
+    '''
+    @staticmethod
+    def dropPreparedAssets(mapName : str):
+        future = MapScene.__preparedMaps.pop(mapName, None)
+
+        if future is not None:
+            future.cancel()
+
+    '''
+    Loads the map in the background as a connected map : its BGM and its own connected maps wait for the character to enter it
+    '''
+    def preload(self):
+        self.__background = True
+        self.getEngine().preloadScene(self)
+
+    '''
+    Makes the connected map loaded in the background the current one, the character entering it at the given position
+    '''
+    def enter(self, position : Tuple):
+        self.__background = False
+
+        self.setCharacterPosition(position)
+
+        # the animation clock went on while the map was in the background
+        self.updateAnimations()
+        self.refreshAnimations()
+
+        if "bgm" in self.__metadata:
+            self.getEngine().playBGM(self.__metadata["bgm"])
+
+        self.updateConnections()
+
+    '''
+    Loads in the background the connected maps whose edge is close to the character, crossing into them then only swaps the scenes
+    The character of the loaded ones follows this one along their edge, so that their camera and streamed chunks are ready
+    The map the character comes from is restored from the cache, it was put there when the character left it
+    '''
+    def updateConnections(self):
+        distances = {
+            "up": self.__characterY,
+            "right": self.__mapWidth - 1 - self.__characterX,
+            "down": self.__mapHeight - 1 - self.__characterY,
+            "left": self.__characterX
+        }
+
+        for edge in self.__connections:
+            scene = self.__connectedScenes.get(edge)
+
+            if scene is None:
+                if distances[edge] <= MapScene.CONNECTIONS_PREFETCH_DISTANCE:
+                    # the size of the connected map is not known yet, the position is set again once it is loaded
+                    scene = MapScene(self.getEngine(), self.__connections[edge]["map"], self.getConnectionPosition(edge, 0, 0))
+                    scene.preload()
+
+                    self.__connectedScenes[edge] = scene
+            elif self.getEngine().isScenePreloaded(scene):
+                width, height = scene.getMapSize()
+                position = self.getConnectionPosition(edge, width, height)
+
+                if 0 <= position[0] < width and 0 <= position[1] < height:
+                    scene.setCharacterPosition(position)
+
+    '''
+    Returns the position of the character in the map connected on the given edge once it crossed it
+    '''
+    def getConnectionPosition(self, edge : str, width : int, height : int) -> Tuple:
+        offset = self.__connections[edge].get("offset", 0)
+
+        if edge == "right":
+            return (0, self.__characterY - offset)
+        elif edge == "left":
+            return (width - 1, self.__characterY - offset)
+        elif edge == "down":
+            return (self.__characterX - offset, 0)
+        else:
+            return (self.__characterX - offset, height - 1)
+
+    '''
+    Replaces this map by the one connected on the given edge if the character is on it and can enter the connected map
+    Returns True if the map was replaced
+    '''
+    def crossConnection(self, edge : str) -> bool:
+        if edge not in self.__connections:
+            return False
 
-            with open(os.path.join(Constants.ACTORS_PATH, self.__mapName, "actors.json"), "r") as f:
-                actorsData = json.loads(f.read())
+        direction, side = MapScene.CONNECTIONS_EDGES[edge]
+        dx, dy, _ = CollisionGrid.MOVES[direction]
 
-            print("     Actors count : " + str(len(actorsData)))
+        # is the character on the edge ?
+        if self.__collisionGrid.isInside(self.__characterX + dx, self.__characterY + dy):
+            return False
 
-            actorModules = {}
+        scene = self.__connectedScenes[edge]
 
-            for actor in actorsData:
+        # the character reached the edge before the connected map was loaded in the background
+        self.getEngine().finishPreload(scene)
 
-                actorX = actor["positionX"]
-                actorY = actor["positionY"]
+        width, height = scene.getMapSize()
+        position = self.getConnectionPosition(edge, width, height)
 
-                # Default values
-                if "name" not in actor:
-                    actor["name"] = None
+        if not (0 <= position[0] < width and 0 <= position[1] < height) or scene.getCollisionGrid().getMask(*position) & side != 0:
+            return False
 
-                if "type" not in actor:
-                    actor["type"] = ""
+        print("Crossing into map " + scene.getMapName() + " at " + str(position))
 
-                if "parameters" not in actor:
-                    actor["parameters"] = {}
+        # this map is cached when it is replaced, before the connected one loads its own connected maps
+        del self.__connectedScenes[edge]
 
-                if "script" not in actor:
-                    actor["script"] = None
+        scene.setCharacterOrientation(self.__characterCharset.getOrientation())
+        self.getEngine().replaceScene(scene)
+        scene.enter(position)
 
-                if not actor["type"] in actorModules:
-                    actorModules[actor["type"]] = importlib.import_module("engine.scene.map.actors." + actor["type"].lower() + "actor")
+        return True
 
-                actorClass = getattr(actorModules[actor["type"]], actor["type"] + "Actor")
+    '''
+    Moves the character and the camera following it, the chunks around the camera are loaded if the map is streamed
+    '''
+    def setCharacterPosition(self, position : Tuple):
+        self.__characterX, self.__characterY = position
 
-                actorInstance = actorClass(self, actorX, actorY, actor["parameters"], actor["script"], actor["name"])
+        self.moveCameraToCharacter()
 
-                actorInstance.load()
-                actorInstance.spawn()
+        if self.__streaming:
+            self.updateStreaming()
 
-        except FileNotFoundError as e:
+    '''
+    Moves the camera if the character is not on the first screen
+    '''
+    def moveCameraToCharacter(self):
+        self.__drawRectX = max(0, min(self.__mapWidth - self.__windowWidth, self.__characterX - int(self.__cameraMovementRectX[1])))
+        self.__drawRectY = max(0, min(self.__mapHeight - self.__windowHeight, self.__characterY - int(self.__cameraMovementRectY[1])))
+
+        self.__characterXOnScreen = self.__characterX - self.__drawRectX
+        self.__characterYOnScreen = self.__characterY - self.__drawRectY
+
+    def createTiles(self, tileIds : Tuple, tileset : Tileset) -> Tuple:
+        # Tile data allocation
+        tile0 = Tile()
+        tile0.surface = pygame.Surface([self.__tileSize, self.__tileSize])
+
+        tile1 = Tile()
+        tile1.surface = pygame.Surface([self.__tileSize, self.__tileSize], pygame.SRCALPHA, 32)
+
+        above = False
+
+        # For each layer
+        for tileId in tileIds:
+            # if there is at least one tile which is above the actors
+            # all the subsequent tiles will be above, regardless of the layer
+            if tileset.above[tileId]:
+                above = True
+
+            # Blit on the correct tile
+            if above:
+                tile = tile1
+            else:
+                tile = tile0
+
+            tile.surface.blit(self.__tilesetTexture, (0, 0), tileset.rects[tileId])
+
+        # if there was no tile drawn on the above layer, discard the tile
+        if not above:
+            tile1 = None
+
+        return (tile0, tile1)
+
+    '''
+    Takes the baked chunks, the tiles, the collision grid and the actors definitions and states of a cached map
+    '''
+    def restoreCachedMap(self, cachedMap : CachedMap):
+        self.__tilesCache = cachedMap.tilesCache
+        self.__chunksMatrix = cachedMap.chunksMatrix
+        self.__collisionGrid = cachedMap.collisionGrid
+
+        self.__actorsDefinitions = cachedMap.actorsDefinitions
+        self.__actorsStates = cachedMap.actorsStates
+        self.__chunksActors = cachedMap.chunksActors
+        self.__actorsChunks = cachedMap.actorsChunks
+
+        self.__loadedChunks = set(chunk for chunksRow in self.__chunksMatrix for chunk in chunksRow if chunk.isLoaded())
+
+    '''
+    Gives the baked chunks, the tiles, the collision grid and the actors definitions and states of the map to the cache
+    The actors must be unloaded first
+    '''
+    def cacheMap(self):
+        cachedMap = CachedMap()
+        cachedMap.metadata = self.__metadata
+        cachedMap.width = self.__mapWidth
+        cachedMap.height = self.__mapHeight
+        cachedMap.tileSize = self.__tileSize
+        cachedMap.tileset = self.__tileset
+        cachedMap.mapData = self.__mapData
+
+        cachedMap.tilesCache = self.__tilesCache
+        cachedMap.chunksMatrix = self.__chunksMatrix
+        cachedMap.collisionGrid = self.__collisionGrid
+
+        cachedMap.actorsDefinitions = self.__actorsDefinitions
+        cachedMap.actorsStates = self.__actorsStates
+        cachedMap.chunksActors = self.__chunksActors
+        cachedMap.actorsChunks = self.__actorsChunks
+
+        MapCache.put(self.__mapName, cachedMap)
+
+    def getTiles(self, tileIds : Tuple) -> Tuple:
+        if tileIds not in self.__tilesCache:
+            self.__tilesCache[tileIds] = self.createTiles(tileIds, self.__tileset)
+
+        return self.__tilesCache[tileIds]
+
+    '''
+    Updates the current frame of the animated tiles if the animation clock reached the next frame change
+    '''
+    def updateAnimations(self):
+        time = AnimationClock.getTime()
+
+        if time < self.__nextAnimationFrame:
+            return
+
+        self.__nextAnimationFrame = math.inf
+
+        for tileId in self.__tileset.animations:
+            frameTileId, nextFrame = self.__tileset.getAnimationFrame(tileId, time)
+            self.__animationFrames[tileId] = frameTileId
+            self.__nextAnimationFrame = min(self.__nextAnimationFrame, nextFrame)
+
+        for tileIds in self.__animatedCells:
+            self.__animatedCells[tileIds] = tuple(self.__animationFrames.get(tileId, tileId) for tileId in tileIds)
+
+    '''
+    Returns the tile ids of the current frame of an animated cell
+    '''
+    def getAnimationFrameTileIds(self, tileIds : Tuple) -> Tuple:
+        if tileIds not in self.__animatedCells:
+            self.__animatedCells[tileIds] = tuple(self.__animationFrames.get(tileId, tileId) for tileId in tileIds)
+
+        return self.__animatedCells[tileIds]
+
+    '''
+    Redraws the animated cells of the visible chunks whose frame changed since they were drawn, run at the end of each update
+    The chunks out of the camera are refreshed once they are visible again
+    '''
+    def refreshAnimations(self):
+        if len(self.__tileset.animations) == 0:
+            return
+
+        colorKey = self.__tilesetTexture.get_colorkey()
+
+        for chunk in self.getVisibleChunks():
+            changedCells = []
+
+            for tileIds, cells in chunk.animatedCells.items():
+                frameTileIds = self.getAnimationFrameTileIds(tileIds)
+
+                if chunk.animationFrames[tileIds] != frameTileIds:
+                    tile0, tile1 = self.getTiles(frameTileIds)
+                    changedCells += [(index, tile0, tile1) for index in cells]
+                    self.__animationsDirtyCells.update((chunk.x + index % chunk.width, chunk.y + index // chunk.width) for index in cells)
+
+                    chunk.animationFrames[tileIds] = frameTileIds
+
+            if len(changedCells) > 0:
+                chunk.redrawCells(changedCells, self.__tileSize, colorKey)
+
+    '''
+    Returns the screen rects of the animated cells redrawn since the last call
+    '''
+    def getAnimationsDirtyRects(self) -> List[pygame.Rect]:
+        offsetX, offsetY = self.getCameraDrawOffset()
+
+        rects = [pygame.Rect((x - self.__drawRectX) * self.__tileSize + offsetX, (y - self.__drawRectY) * self.__tileSize + offsetY, self.__tileSize, self.__tileSize)
+                 for x, y in self.__animationsDirtyCells]
+
+        self.__animationsDirtyCells.clear()
+
+        return rects
+
+    def createChunks(self):
+        chunksCountX = math.ceil(self.__mapWidth / MapScene.CHUNK_SIZE)
+        chunksCountY = math.ceil(self.__mapHeight / MapScene.CHUNK_SIZE)
+
+        for cy in range(chunksCountY):
+            self.__chunksMatrix.append([])
+            for cx in range(chunksCountX):
+                x = cx * MapScene.CHUNK_SIZE
+                y = cy * MapScene.CHUNK_SIZE
+
+                self.__chunksMatrix[cy].append(Chunk(x, y, min(MapScene.CHUNK_SIZE, self.__mapWidth - x), min(MapScene.CHUNK_SIZE, self.__mapHeight - y)))
+
+        print("     Chunks count : " + str(chunksCountX) + "*" + str(chunksCountY))
+
+    def getChunkAt(self, x : int, y : int) -> Chunk:
+        # the chunk containing the given cell, None if it is outside of the map
+        if x < 0 or y < 0 or x >= self.__mapWidth or y >= self.__mapHeight:
+            return None
+
+        return self.__chunksMatrix[y // MapScene.CHUNK_SIZE][x // MapScene.CHUNK_SIZE]
+
+    '''
+    Creates the tiles of the chunk from the map data and bakes them
+    '''
+    def loadChunk(self, chunk : Chunk):
+        tiles0 = []
+        tiles1 = []
+
+        animations = self.__tileset.animations
+
+        for y in range(chunk.y, chunk.y + chunk.height):
+            for x in range(chunk.x, chunk.x + chunk.width):
+                tileIds = self.__mapData.getTileIds(x, y)
+
+                # animated cells are baked with their current frame
+                if len(animations) > 0 and any(tileId in animations for tileId in tileIds):
+                    frameTileIds = self.getAnimationFrameTileIds(tileIds)
+                    chunk.addAnimatedCell(x, y, tileIds, frameTileIds)
+                    tileIds = frameTileIds
+
+                tile0, tile1 = self.getTiles(tileIds)
+
+                tiles0.append(tile0)
+                tiles1.append(tile1)
+
+        chunk.setTiles(tiles0, tiles1)
+        chunk.bake(self.__tileSize, self.__tilesetTexture.get_colorkey())
+
+    '''
+    Loads the chunks getting close to the camera and unloads the ones far from it
+    Actors are loaded with their chunk, and unloaded once their chunk is unloaded and they are not busy
+    '''
+    def updateStreaming(self):
+        firstX = max(0, (self.__drawRectX - 1 - MapScene.STREAMING_LOAD_MARGIN) // MapScene.CHUNK_SIZE)
+        firstY = max(0, (self.__drawRectY - 1 - MapScene.STREAMING_LOAD_MARGIN) // MapScene.CHUNK_SIZE)
+        lastX = min(len(self.__chunksMatrix[0]) - 1, (self.__drawRectX + self.__windowWidth + MapScene.STREAMING_LOAD_MARGIN) // MapScene.CHUNK_SIZE)
+        lastY = min(len(self.__chunksMatrix) - 1, (self.__drawRectY + self.__windowHeight + MapScene.STREAMING_LOAD_MARGIN) // MapScene.CHUNK_SIZE)
+
+        window = (firstX, firstY, lastX, lastY)
+
+        if window != self.__streamingWindow:
+            self.__streamingWindow = window
+
+            # Unload the chunks far from the camera
+            for chunk in list(self.__loadedChunks):
+                if chunk.x + chunk.width <= self.__drawRectX - MapScene.STREAMING_UNLOAD_MARGIN or chunk.x > self.__drawRectX + self.__windowWidth + MapScene.STREAMING_UNLOAD_MARGIN \
+                        or chunk.y + chunk.height <= self.__drawRectY - MapScene.STREAMING_UNLOAD_MARGIN or chunk.y > self.__drawRectY + self.__windowHeight + MapScene.STREAMING_UNLOAD_MARGIN:
+                    chunk.unload()
+                    self.__loadedChunks.remove(chunk)
+
+            # Load the chunks close to the camera
+            for cy in range(firstY, lastY + 1):
+                for cx in range(firstX, lastX + 1):
+                    chunk = self.__chunksMatrix[cy][cx]
+                    if not chunk.isLoaded():
+                        self.loadChunk(chunk)
+                        self.__loadedChunks.add(chunk)
+                        self.loadChunkActors(cx, cy)
+
+        # Unload the actors standing on unloaded chunks once they are done with what they are doing
+        for index, actor in list(self.__actorsInstances.items()):
+            chunk = self.getChunkAt(actor.getPosX(), actor.getPosY())
+            if (chunk is None or not chunk.isLoaded()) and not actor.isBusy():
+                self.unloadActor(index)
+
+    def loadActorsDefinitions(self, actorsData : List):
+        if actorsData is None:
             print("     No actors found for this map")
+            return
 
-        print("Done loading map")
+        print("     Actors count : " + str(len(actorsData)))
+
+        for actor in actorsData:
+            # Default values
+            if "name" not in actor:
+                actor["name"] = None
+
+            if "type" not in actor:
+                actor["type"] = ""
+
+            if "parameters" not in actor:
+                actor["parameters"] = {}
+
+            if "script" not in actor:
+                actor["script"] = None
+
+            index = len(self.__actorsDefinitions)
+            self.__actorsDefinitions.append(actor)
+            self.setActorChunk(index, actor["positionX"], actor["positionY"])
+
+    def setActorChunk(self, index : int, posX : int, posY : int):
+        # the actor will be loaded with the chunk of the given position
+        if index in self.__actorsChunks:
+            self.__chunksActors[self.__actorsChunks[index]].remove(index)
+
+        key = (posX // MapScene.CHUNK_SIZE, posY // MapScene.CHUNK_SIZE)
+
+        if key not in self.__chunksActors:
+            self.__chunksActors[key] = []
+
+        self.__chunksActors[key].append(index)
+        self.__actorsChunks[index] = key
+
+    def loadChunkActors(self, cx : int, cy : int):
+        # in the order of the actors file, as when the whole map is loaded
+        for index in sorted(self.__chunksActors.get((cx, cy), [])):
+            if index not in self.__actorsInstances:
+                self.loadActor(index)
+
+    '''
+    Creates, loads and spawns an actor of the actors file
+    If it has been unloaded before, its state is restored
+    '''
+    def loadActor(self, index : int):
+        actor = self.__actorsDefinitions[index]
+
+        if not actor["type"] in self.__actorModules:
+            self.__actorModules[actor["type"]] = importlib.import_module("engine.scene.map.actors." + actor["type"].lower() + "actor")
+
+        actorClass = getattr(self.__actorModules[actor["type"]], actor["type"] + "Actor")
+
+        actorInstance = actorClass(self, actor["positionX"], actor["positionY"], actor["parameters"], actor["script"], actor["name"])
+
+        actorInstance.load()
+
+        if index in self.__actorsStates:
+            actorInstance.setState(self.__actorsStates.pop(index))
+
+        actorInstance.spawn()
+
+        self.__actorsInstances[index] = actorInstance
+
+    '''
+    Unloads an actor, keeping its state to restore it when its chunk is loaded again
+    '''
+    def unloadActor(self, index : int):
+        actor = self.__actorsInstances.pop(index)
+
+        self.__actorsStates[index] = actor.getState()
+        self.setActorChunk(index, actor.getPosX(), actor.getPosY())
+
+        actor.unload()
 
     def spawnActor(self, actor : Actor, posX : int, posY : int):
-        self.actorsMatrix[posY][posX] = actor
+        self.indexActor(actor, posX, posY)
 
         name = actor.getName()
         if name is not None:
@@ -367,8 +934,13 @@ class MapScene(Scene):
             self.actorsByName[name] = actor
 
     def despawnActor(self, posX : int, posY : int):
-        actor = self.actorsMatrix[posY][posX]
-        self.actorsMatrix[posY][posX] = None
+        actor = self.getActorAt(posX, posY)
+
+        # already despawned by an actor spawned on the same cell
+        if actor is None:
+            return
+
+        self.unindexActor(posX, posY)
 
         name = actor.getName()
 
@@ -378,22 +950,102 @@ class MapScene(Scene):
     def unload(self):
         super().unload()
 
-        for y in range(self.__mapHeight):
-            for x in range(self.__mapWidth):
-                actor = self.actorsMatrix[y][x]
-                if actor is not None:
-                    actor.despawn()
-                    actor.unload()
+        # the connected maps loaded in the background are cached before this one, which is more likely to be visited again
+        for scene in self.__connectedScenes.values():
+            self.getEngine().cancelPreload(scene)
+
+        self.__connectedScenes = {}
+
+        # the state of the actors is kept with the map in the cache
+        for index in list(self.__actorsInstances):
+            self.unloadActor(index)
+
+        if not self.__loaded:
+            MapScene.dropPreparedAssets(self.__mapName)
+
+        if MapCache.ENABLED and self.__loaded:
+            self.cacheMap()
+        else:
+            for chunksRow in self.__chunksMatrix:
+                for chunk in chunksRow:
+                    chunk.unload()
+
+            if self.__mapData is not None:
+                self.__mapData.close()
+
+        self.__chunksMatrix = []
+        self.__loadedChunks = set()
+        self.__tilesCache = {}
+        self.__mapData = None
+        self.__loaded = False
 
     def updateActorPosition(self, oldX : int, oldY : int, newX : int, newY : int):
-        actor = self.actorsMatrix[oldY][oldX]
+        actor = self.getActorAt(oldX, oldY)
 
-        if self.actorsMatrix[newY][newX] is not None:
+        if self.getActorAt(newX, newY) is not None:
             raise Exception("Cannot move an actor on top of another")
 
         if actor is not None:
-            self.actorsMatrix[oldY][oldX] = None
-            self.actorsMatrix[newY][newX] = actor
+            self.unindexActor(oldX, oldY)
+            self.indexActor(actor, newX, newY)
+
+    def indexActor(self, actor : Actor, posX : int, posY : int):
+        if posY not in self.__actorsRows:
+            self.__actorsRows[posY] = {}
+
+        self.__actorsRows[posY][posX] = actor
+
+    def unindexActor(self, posX : int, posY : int):
+        row = self.__actorsRows.get(posY)
+
+        if row is not None and posX in row:
+            del row[posX]
+
+            if len(row) == 0:
+                del self.__actorsRows[posY]
+
+    def getActorAt(self, posX : int, posY : int) -> Actor:
+        row = self.__actorsRows.get(posY)
+
+        if row is None:
+            return None
+
+        return row.get(posX)
+
+    def getActors(self) -> List[Actor]:
+        # All the actors, in row order
+        actors = []
+
+        for y in sorted(self.__actorsRows):
+            row = self.__actorsRows[y]
+            for x in sorted(row):
+                actors.append(row[x])
+
+        return actors
+
+    def getActorsInRect(self, rectX : int, rectY : int, width : int, height : int) -> List[Actor]:
+        # Actors inside the given rect in tiles, in row order
+        actors = []
+
+        if len(self.__actorsRows) < height:
+            rows = sorted(y for y in self.__actorsRows if rectY <= y < rectY + height)
+        else:
+            rows = (y for y in range(rectY, rectY + height) if y in self.__actorsRows)
+
+        for y in rows:
+            row = self.__actorsRows[y]
+            for x in sorted(row):
+                if rectX <= x < rectX + width:
+                    actors.append(row[x])
+
+        return actors
+
+    def getVisibleActors(self) -> List[Actor]:
+        # Actors inside the camera rect and its margin, in row order
+        return self.getActorsInRect(self.__drawRectX - MapScene.ACTORS_DRAW_MARGIN,
+                                    self.__drawRectY - MapScene.ACTORS_DRAW_MARGIN,
+                                    self.__windowWidth + MapScene.ACTORS_DRAW_MARGIN * 2,
+                                    self.__windowHeight + MapScene.ACTORS_DRAW_MARGIN * 2)
 
     def getCharacterOrientation(self) -> int:
         return self.__characterCharset.getOrientation()
@@ -401,32 +1053,152 @@ class MapScene(Scene):
     def draw(self):
         super().draw()
 
+        self.__blitsCount = 0
+
+        cameraOffset = self.getCameraDrawOffset()
+
         # First layer
-        self.drawMatrix(self.__tilesMatrix0)
+        if MapScene.CHUNKED_RENDERING:
+            self.drawChunks(0, cameraOffset)
+        else:
+            self.drawTiles(0, cameraOffset)
 
-        clockTime = self.getEngine().getClockDate()
+        actorsOffsetX, actorsOffsetY = self.getActorsDrawOffset()
 
         # Actors and character
-        for y in range(self.__mapHeight):
-            for x in range(self.__mapWidth):
-                actor = self.actorsMatrix[y][x]
+        # the character is drawn after the actors of the rows above and of the same cell
+        characterDrawn = False
+
+        for actor in self.getVisibleActors():
+            if not characterDrawn and (actor.getPosY(), actor.getPosX()) > (self.__characterY, self.__characterX):
+                self.__window.blit(*self.getCharacterSprite())
+                characterDrawn = True
 
-                if actor is not None and actor.lastUpdateDate != clockTime:
-                    actor.update(self.__dt, self.__events)
-                    actor.draw(self.__cameraOffsetX.value - self.__drawRectX * self.__tileSize + self.__mapOffsetX, self.__cameraOffsetY.value - self.__drawRectY * self.__tileSize + self.__mapOffsetY)
-                    actor.lastUpdateTime = clockTime
+            self.__blitsCount += actor.draw(actorsOffsetX, actorsOffsetY)
 
-                # Character
-                if y == self.__characterY and x == self.__characterX:
-                    self.__window.blit(self.__characterCharset.getCurrentSurface(),
-                           (self.__characterXOnScreen * self.__tileSize + self.__characterOffsetX.value - self.__characterCharsetOffsetX + self.__mapOffsetX, self.__characterYOnScreen * self.__tileSize + self.__characterOffsetY.value - self.__characterCharsetOffsetY + self.__mapOffsetY))
+        if not characterDrawn:
+            self.__window.blit(*self.getCharacterSprite())
+
+        self.__blitsCount += 1
 
         # Second layer
-        self.drawMatrix(self.__tilesMatrix1)
+        if MapScene.CHUNKED_RENDERING:
+            self.drawChunks(1, cameraOffset)
+        else:
+            self.drawTiles(1, cameraOffset)
 
         # Dialog
         if self.__dialogRenderer is not None:
             self.__dialogRenderer.draw()
+            self.__blitsCount += self.__dialogRenderer.getBlitsCount()
+
+    def getBlitsCount(self) -> int:
+        return self.__blitsCount
+
+    def getActiveTweensCount(self) -> int:
+        count = super().getActiveTweensCount()
+
+        for tween in (self.__cameraTween, self.__characterTween):
+            if tween is not None and tween.alive:
+                count += 1
+
+        if self.__dialogRenderer is not None:
+            count += self.__dialogRenderer.getActiveTweensCount()
+
+        for actor in self.getActors():
+            count += actor.getActiveTweensCount()
+
+        return count
+
+    def getActiveTimersCount(self) -> int:
+        count = super().getActiveTimersCount()
+
+        if self.__bumpTimer is not None and self.__bumpTimer.alive:
+            count += 1
+
+        if self.__dialogRenderer is not None:
+            count += self.__dialogRenderer.getActiveTimersCount()
+
+        for actor in self.getActors():
+            count += actor.getActiveTimersCount()
+
+        return count
+
+    def getActiveInterpretersCount(self) -> int:
+        count = super().getActiveInterpretersCount()
+
+        for actor in self.getActors():
+            count += actor.getActiveInterpretersCount()
+
+        return count
+
+    def updateActors(self, dt : int, events : List[pygame.event.Event]):
+        for actor in self.getActors():
+            actor.update(dt, events)
+
+    '''
+    Returns the offset in px of the drawn map, the camera offset is floored once
+    so that the chunks, the tiles and the actors are moved by the same number of pixels
+    '''
+    def getCameraDrawOffset(self) -> Tuple:
+        return (math.floor(self.__cameraOffsetX.getRenderValue()) + self.__mapOffsetX, math.floor(self.__cameraOffsetY.getRenderValue()) + self.__mapOffsetY)
+
+    def getActorsDrawOffset(self) -> Tuple:
+        offsetX, offsetY = self.getCameraDrawOffset()
+        return (offsetX - self.__drawRectX * self.__tileSize, offsetY - self.__drawRectY * self.__tileSize)
+
+    def getCharacterSprite(self) -> Tuple:
+        return (self.__characterCharset.getCurrentSurface(),
+                (self.__characterXOnScreen * self.__tileSize + self.__characterOffsetX.getRenderValue() - self.__characterCharsetOffsetX + self.__mapOffsetX, self.__characterYOnScreen * self.__tileSize + self.__characterOffsetY.getRenderValue() - self.__characterCharsetOffsetY + self.__mapOffsetY))
+
+    def getDirtyRects(self) -> List[pygame.Rect]:
+        # Sprites (surface, rect) of the character and of the actors
+        actorsOffsetX, actorsOffsetY = self.getActorsDrawOffset()
+
+        sprites = {}
+        for actor in self.getVisibleActors():
+            sprite = actor.getSprite(actorsOffsetX, actorsOffsetY)
+            if sprite is not None:
+                sprites[actor] = (sprite[0], pygame.Rect(sprite[1], sprite[0].get_size()))
+
+        characterSprite = self.getCharacterSprite()
+        sprites[self.__characterCharset] = (characterSprite[0], pygame.Rect(characterSprite[1], characterSprite[0].get_size()))
+
+        lastSprites = self.__lastSprites
+        self.__lastSprites = sprites
+
+        # Animated cells redrawn since the last frame
+        animationsDirtyRects = self.getAnimationsDirtyRects()
+
+        # The camera scrolled : the whole map moved
+        camera = (self.__drawRectX, self.__drawRectY) + self.getCameraDrawOffset()
+        if camera != self.__lastCamera or lastSprites is None:
+            self.__lastCamera = camera
+            return None
+
+        dirtyRects = []
+
+        # Sprites that moved, changed or disappeared
+        # rects are inflated by one pixel to cover the rounding of float positions
+        for key in sprites.keys() | lastSprites.keys():
+            sprite = sprites.get(key)
+            lastSprite = lastSprites.get(key)
+
+            if sprite != lastSprite:
+                if sprite is not None:
+                    dirtyRects.append(sprite[1].inflate(2, 2))
+                if lastSprite is not None:
+                    dirtyRects.append(lastSprite[1].inflate(2, 2))
+
+        dirtyRects += animationsDirtyRects
+
+        # Dialog, including the frame it has been closed
+        if self.__dialogRenderer is not None or self.__dialogShown:
+            dirtyRects.append(pygame.Rect(self.__dialogBoundaries))
+
+        self.__dialogShown = self.__dialogRenderer is not None
+
+        return dirtyRects
 
     def canCameraMoveLeft(self) -> bool:
         return self.__drawRectX > 0
@@ -448,10 +1220,7 @@ class MapScene(Scene):
             return False
 
         # Tile collision
-        try:
-            return self.__characterX > 0 and not (self.__tilesMatrix0[self.__characterY][self.__characterX-1].collision[1])
-        except IndexError:
-            return False
+        return self.__collisionGrid.canMove(self.__characterX, self.__characterY, CollisionGrid.LEFT)
 
     def canCharacterMoveRight(self) -> bool:
         # Actor collision
@@ -461,10 +1230,7 @@ class MapScene(Scene):
             return False
 
         # Tile collision
-        try:
-            return not self.__tilesMatrix0[self.__characterY][self.__characterX+1].collision[3]
-        except IndexError:
-            return False
+        return self.__collisionGrid.canMove(self.__characterX, self.__characterY, CollisionGrid.RIGHT)
 
     def canCharacterMoveUp(self) -> bool:
         # Actor collision
@@ -474,10 +1240,7 @@ class MapScene(Scene):
             return False
 
         # Tile collision
-        try:
-            return self.__characterY > 0 and not (self.__tilesMatrix0[self.__characterY - 1][self.__characterX].collision[2])
-        except IndexError:
-            return False
+        return self.__collisionGrid.canMove(self.__characterX, self.__characterY, CollisionGrid.UP)
 
     def canCharacterMoveDown(self) -> bool:
         # Actor collision
@@ -487,10 +1250,7 @@ class MapScene(Scene):
             return False
 
         # Tile collision
-        try:
-            return not self.__tilesMatrix0[self.__characterY + 1][self.__characterX].collision[0]
-        except IndexError:
-            return False
+        return self.__collisionGrid.canMove(self.__characterX, self.__characterY, CollisionGrid.DOWN)
 
 
     def getActorWhichCharacterFaces(self) -> Actor:
@@ -508,19 +1268,12 @@ class MapScene(Scene):
         elif orientation == Charset.ORIENTATION_RIGHT:
             actorPosX += 1
 
-        if actorPosX < 0 or actorPosY < 0:
-            return None
-
-        try:
-            return self.actorsMatrix[actorPosY][actorPosX]
-        except IndexError:
-            return None
+        return self.getActorAt(actorPosX, actorPosY)
 
     def update(self, dt : int, events : List[pygame.event.Event]):
         super().update(dt, events)
 
-        self.__dt = dt
-        self.__events = events
+        self.updateAnimations()
 
         if self.__cameraTween is not None:
             self.__cameraTween.update(dt)
@@ -531,6 +1284,9 @@ class MapScene(Scene):
         if self.__bumpTimer is not None:
             self.__bumpTimer.update(dt)
 
+        if self.__streaming:
+            self.updateStreaming()
+
         if self.__inputsLocks == 0:
             orientation = self.__characterCharset.getOrientation()
 
@@ -546,7 +1302,7 @@ class MapScene(Scene):
                             gameActor.onActionPressed()
 
             # Arrow keys
-            keys = pygame.key.get_pressed()
+            keys = Input.getPressedKeys()
 
             playerPosXOnScreen = self.__characterXOnScreen - self.__cameraOffsetX.value
             playerPosYOnScreen = self.__characterYOnScreen - self.__cameraOffsetY.value
@@ -557,6 +1313,8 @@ class MapScene(Scene):
             if keys[pygame.K_LEFT]:
                 self.__characterCharset.setOrientation(Charset.ORIENTATION_LEFT)
                 self.processTouchEvent()
+                if self.crossConnection("left"):
+                    return
                 if self.canCharacterMoveLeft():
                     self.__characterCharset.incrementStep()
                     if isPlayerInCameraScrollRectX and self.canCameraMoveLeft():
@@ -571,6 +1329,8 @@ class MapScene(Scene):
             elif keys[pygame.K_RIGHT]:
                 self.__characterCharset.setOrientation(Charset.ORIENTATION_RIGHT)
                 self.processTouchEvent()
+                if self.crossConnection("right"):
+                    return
                 if self.canCharacterMoveRight():
                     self.__characterCharset.incrementStep()
                     if isPlayerInCameraScrollRectX and self.canCameraMoveRight():
@@ -585,6 +1345,8 @@ class MapScene(Scene):
             elif keys[pygame.K_UP]:
                 self.__characterCharset.setOrientation(Charset.ORIENTATION_UP)
                 self.processTouchEvent()
+                if self.crossConnection("up"):
+                    return
                 if self.canCharacterMoveUp():
                     self.__characterCharset.incrementStep()
                     if isPlayerInCameraScrollRectY and self.canCameraMoveUp():
@@ -599,6 +1361,8 @@ class MapScene(Scene):
             elif keys[pygame.K_DOWN]:
                 self.__characterCharset.setOrientation(Charset.ORIENTATION_DOWN)
                 self.processTouchEvent()
+                if self.crossConnection("down"):
+                    return
                 if self.canCharacterMoveDown():
                     self.__characterCharset.incrementStep()
                     if isPlayerInCameraScrollRectY and self.canCameraMoveDown():
@@ -620,6 +1384,12 @@ class MapScene(Scene):
         if self.__dialogRenderer is not None:
             self.__dialogRenderer.update(dt, events)
 
+        # Actors
+        self.updateActors(dt, events)
+
+        # Animated cells whose frame changed, once the camera moved so that the newly visible chunks are up to date
+        self.refreshAnimations()
+
     def canBump(self, tag):
         self.__bumpPlayed = False
 
@@ -637,7 +1407,7 @@ class MapScene(Scene):
         SFX.play("bump")
 
 
-    def drawMatrix(self, matrix : List[List]):
+    def drawTiles(self, layer : int, cameraOffset : Tuple):
         # Draw the map
         for y in range(self.__windowHeight + 2):
             for x in range(self.__windowWidth + 2):
@@ -647,20 +1417,39 @@ class MapScene(Scene):
                 yInMatrix = trueY + self.__drawRectY
                 xInMatrix = trueX + self.__drawRectX
 
-                if xInMatrix < 0 or yInMatrix < 0:
-                    continue
+                chunk = self.getChunkAt(xInMatrix, yInMatrix)
 
-                try:
-                    tileToDraw = matrix[yInMatrix][xInMatrix]
-                except IndexError:
+                if chunk is None or not chunk.isLoaded():
                     continue
 
+                tileToDraw = chunk.getTiles(xInMatrix, yInMatrix)[layer]
+
                 if tileToDraw is not None:
-                    self.__window.blit(tileToDraw.surface, (trueX * self.__tileSize + self.__cameraOffsetX.value + self.__mapOffsetX, trueY * self.__tileSize + self.__cameraOffsetY.value + self.__mapOffsetY))
+                    self.__blitsCount += 1
+                    self.__window.blit(tileToDraw.surface, (trueX * self.__tileSize + cameraOffset[0], trueY * self.__tileSize + cameraOffset[1]))
+
+    def getVisibleChunks(self) -> List[Chunk]:
+        # the chunks overlapping the tiles drawn by drawTiles()
+        firstX = max(0, (self.__drawRectX - 1) // MapScene.CHUNK_SIZE)
+        firstY = max(0, (self.__drawRectY - 1) // MapScene.CHUNK_SIZE)
+        lastX = min(len(self.__chunksMatrix[0]) - 1, (self.__drawRectX + self.__windowWidth) // MapScene.CHUNK_SIZE)
+        lastY = min(len(self.__chunksMatrix) - 1, (self.__drawRectY + self.__windowHeight) // MapScene.CHUNK_SIZE)
 
+        return [self.__chunksMatrix[cy][cx] for cy in range(firstY, lastY + 1) for cx in range(firstX, lastX + 1)]
+
+    def drawChunks(self, layer : int, cameraOffset : Tuple):
+        # Only draw the chunks overlapping the tiles drawn by drawTiles()
+        for chunk in self.getVisibleChunks():
+            surface = chunk.surface0 if layer == 0 else chunk.surface1
+
+            if surface is not None:
+                self.__blitsCount += 1
+                self.__window.blit(surface, ((chunk.x - self.__drawRectX) * self.__tileSize + cameraOffset[0], (chunk.y - self.__drawRectY) * self.__tileSize + cameraOffset[1]))
 
     def onCharacterEnteredTile(self):
-        actor = self.actorsMatrix[self.__characterY][self.__characterX]
+        self.updateConnections()
+
+        actor = self.getActorAt(self.__characterX, self.__characterY)
 
         if actor is not None:
             actor.onCharacterEnteredTile()
@@ -0,0 +1,126 @@
+import bisect
+import json
+import os
+import threading
+from typing import Tuple
+
+from data.constants import Constants
+
+
+class Tileset:
+    '''
+    Properties of the tiles of a tileset, parsed once and shared by all the maps using it
+    Indexed by tile id (the Tiled gid minus 1)
+    '''
+
+    TYPE_ABOVE_ACTORS = "aboveActors"
+
+    # collision mask bits : a cell with this tile cannot be entered from this side
+    COLLISION_UP = 1
+    COLLISION_RIGHT = 2
+    COLLISION_DOWN = 4
+    COLLISION_LEFT = 8
+
+    COLLISION_FLAGS = {
+        "up": COLLISION_UP,
+        "right": COLLISION_RIGHT,
+        "down": COLLISION_DOWN,
+        "left": COLLISION_LEFT
+    }
+
+    __tilesets = {}  # tileset name -> Tileset
+    __lock = threading.Lock()  # tilesets can be loaded by the asset loader workers
+
+    def __init__(self, name : str, data : dict):
+        self.name = name
+        self.tileSize = data["tilewidth"]  # in px
+        self.tilesCount = int(data["imagewidth"] / self.tileSize) * int(data["imageheight"] / self.tileSize)
+
+        self.above = bytearray(self.tilesCount)  # 1 if the tile is above the actors
+        self.collision = bytearray(self.tilesCount)  # collision mask of the tile
+        self.rects = []  # (x, y, width, height) of the tile in the tileset texture
+        self.animations = {}  # tile id -> (frames tile ids, end time of each frame in ms), for the animated tiles
+
+        self.__collisionErrors = {}  # tile id -> unknown collision flag, only raised if a map uses the tile
+
+        columns = int(data["imagewidth"] / self.tileSize)
+        for tileId in range(self.tilesCount):
+            self.rects.append(((tileId % columns) * self.tileSize, (tileId // columns) * self.tileSize, self.tileSize, self.tileSize))
+
+        tiles = data.get("tiles", {})
+        for tileId in tiles:
+            if tiles[tileId].get("type") == Tileset.TYPE_ABOVE_ACTORS:
+                self.above[int(tileId)] = 1
+
+            # Tiled animation frames
+            if "animation" in tiles[tileId]:
+                framesIds = []
+                framesEnds = []
+                for frame in tiles[tileId]["animation"]:
+                    if frame["duration"] <= 0:
+                        raise Exception("The frames of the animated tile " + tileId + " of the tileset " + name + " must have a duration")
+
+                    framesIds.append(frame["tileid"])
+                    framesEnds.append((framesEnds[-1] if len(framesEnds) > 0 else 0) + frame["duration"])
+
+                if len(framesIds) > 0:
+                    self.animations[int(tileId)] = (tuple(framesIds), tuple(framesEnds))
+
+        tileProperties = data.get("tileproperties", {})
+        for tileId in tileProperties:
+            collisionStr = tileProperties[tileId].get("collision", "")
+            if len(collisionStr) <= 0:
+                continue
+
+            for flag in collisionStr.split(";"):
+                if flag in Tileset.COLLISION_FLAGS:
+                    self.collision[int(tileId)] |= Tileset.COLLISION_FLAGS[flag]
+                else:
+                    self.__collisionErrors[int(tileId)] = flag
+
+    def isAbove(self, tileId : int) -> bool:
+        return self.above[tileId] == 1
+
+    def getCollision(self, tileId : int) -> int:
+        if tileId in self.__collisionErrors:
+            raise Exception("Unknown collision parameter : " + self.__collisionErrors[tileId])
+
+        return self.collision[tileId]
+
+    def getRect(self, tileId : int) -> Tuple:
+        return self.rects[tileId]
+
+    def isAnimated(self, tileId : int) -> bool:
+        return tileId in self.animations
+
+    '''
+    Returns the tile id of the frame of the animated tile at the given animation clock time, and the time of its next frame
+    '''
+    def getAnimationFrame(self, tileId : int, time : int) -> Tuple[int, int]:
+        framesIds, framesEnds = self.animations[tileId]
+
+        timeInLoop = time % framesEnds[-1]
+        frame = bisect.bisect_right(framesEnds, timeInLoop)
+
+        return (framesIds[frame], time - timeInLoop + framesEnds[frame])
+
+    @staticmethod
+    def getPath(name : str) -> str:
+        return os.path.join(Constants.TILESETS_PATH, name + ".json")
+
+    '''
+    Returns the tileset, parsed on first use
+    '''
+    @staticmethod
+    def get(name : str) -> 'Tileset':
+        with Tileset.__lock:
+            if name not in Tileset.__tilesets:
+                with open(Tileset.getPath(name), "r") as f:
+                    Tileset.__tilesets[name] = Tileset(name, json.loads(f.read()))
+
+            return Tileset.__tilesets[name]
+
+    @staticmethod
+    def unload():
+        with Tileset.__lock:
+            Tileset.__tilesets = {}
@@ -1,4 +1,4 @@
-from typing import List, Callable
+from typing import List, Callable, Iterator
 
 import pygame
 
@@ -13,6 +13,7 @@ class Scene:
         self.__engine = engine
         self.__tweenList = []
         self.__timersList = []
+        self.__textures = []  # names of the textures pinned by this scene
 
     def pushTimer(self, timer : Timer):
         self.__timersList.append(timer)
@@ -20,8 +21,31 @@ class Scene:
     def load(self):
         pass
 
+    '''
+    Loads the scene in steps, the engine runs as many of them as its loading budget allows each frame
+    Scenes that do not override it are loaded in one step
+    '''
+    def loadSteps(self) -> Iterator:
+        self.load()
+        yield
+
     def unload(self):
-        pass
+        self.releaseTextures()
+
+    '''
+    Returns the texture and keeps it loaded until the scene is unloaded
+    '''
+    def acquireTexture(self, name : str) -> pygame.Surface:
+        from engine.graphics.textures import Textures
+        self.__textures.append(name)
+        return Textures.acquireTexture(name)
+
+    def releaseTextures(self):
+        from engine.graphics.textures import Textures
+        for name in self.__textures:
+            Textures.releaseTexture(name)
+
+        self.__textures = []
 
     def draw(self):
         pass
@@ -45,6 +69,25 @@ class Scene:
     def shouldDrawUnderlyingScenes(self) -> bool:
         return True
 
+    # Returns the screen rects that changed since the last call, called
+    # between update() and draw() when the engine renders with dirty rects
+    # None means the whole screen needs to be redrawn
+    def getDirtyRects(self) -> List[pygame.Rect]:
+        return None
+
+    # Number of blits made by the last draw()
+    def getBlitsCount(self) -> int:
+        return 0
+
+    def getActiveTweensCount(self) -> int:
+        return len(self.__tweenList)
+
+    def getActiveTimersCount(self) -> int:
+        return len(self.__timersList)
+
+    def getActiveInterpretersCount(self) -> int:
+        return 0
+
     def pushTween(self, tag : str, subject : TweenSubject, targetValue : float, duration : int, easing : Callable):
         tween = Tween(tag, subject, targetValue, duration, easing)
 
@@ -0,0 +1,150 @@
+import io
+import os
+import queue
+import threading
+
+import pygame
+
+
+class BGM:
+    '''
+    Plays the BGMs without blocking the main loop :
+    the files are read by a worker thread, and the tracks changes fade out then fade in
+    pygame.mixer.music can only play one track at a time, so there is no overlap between the two tracks
+    '''
+
+    FADE_OUT_DURATION = 500  # ms
+    FADE_IN_DURATION = 500  # ms
+
+    STATE_IDLE = 0
+    STATE_FADING_OUT = 1
+    STATE_WAITING = 2  # waiting for the worker to read the next track
+    STATE_FADING_IN = 3
+
+    __requests = None  # queue of the tracks names to read, for the worker
+    __prefetched = None  # queue of (track name, BytesIO or error message) read by the worker
+    __worker = None
+
+    __current = None  # name of the track playing or fading in
+    __requested = None  # name of the last requested track
+    __next = None  # (track name, BytesIO) of the track to play once the current one faded out
+    __state = STATE_IDLE
+    __fade = 0  # progress of the current fade, in ms
+
+    @staticmethod
+    def load():
+        BGM.__requests = queue.Queue()
+        BGM.__prefetched = queue.Queue()
+
+        BGM.__worker = threading.Thread(target=BGM.work, name="BGM", daemon=True)
+        BGM.__worker.start()
+
+    @staticmethod
+    def unload():
+        if BGM.__worker is not None:
+            BGM.__requests.put(None)
+            BGM.__worker = None
+
+        BGM.__current = None
+        BGM.__requested = None
+        BGM.__next = None
+        BGM.__state = BGM.STATE_IDLE
+
+    '''
+    Worker thread : reads the requested tracks in memory
+    '''
+    @staticmethod
+    def work():
+        from data.constants import Constants
+
+        requests = BGM.__requests
+        prefetched = BGM.__prefetched
+
+        while True:
+            musicName = requests.get()
+            if musicName is None:
+                return
+
+            bgmPath = os.path.join(Constants.BGM_PATH, musicName + ".mp3")
+
+            try:
+                with open(bgmPath, "rb") as f:
+                    prefetched.put((musicName, io.BytesIO(f.read())))
+            except OSError as e:
+                prefetched.put((musicName, str(e)))
+
+    '''
+    Requests a track, nothing happens if it is already the requested one
+    '''
+    @staticmethod
+    def play(musicName : str):
+        if musicName == BGM.__requested:
+            return
+
+        BGM.__requested = musicName
+        BGM.__requests.put(musicName)
+
+        # fade out the current track while the next one is being read
+        if BGM.__state in (BGM.STATE_IDLE, BGM.STATE_FADING_IN) and BGM.__current is not None:
+            BGM.__state = BGM.STATE_FADING_OUT
+            BGM.__fade = 0
+        elif BGM.__state != BGM.STATE_FADING_OUT:
+            BGM.__state = BGM.STATE_WAITING
+
+    @staticmethod
+    def getVolume() -> float:
+        from data.constants import Constants
+        return Constants.BGM_VOLUME * Constants.MASTER_VOLUME
+
+    @staticmethod
+    def update(dt : float):
+        # Keep the last track read by the worker, the previous requests are outdated
+        while not BGM.__prefetched.empty():
+            musicName, data = BGM.__prefetched.get()
+            if musicName == BGM.__requested:
+                BGM.__next = (musicName, data)
+
+        if BGM.__state == BGM.STATE_FADING_OUT:
+            BGM.__fade += dt
+            if BGM.__fade < BGM.FADE_OUT_DURATION:
+                pygame.mixer.music.set_volume(BGM.getVolume() * (1 - BGM.__fade / BGM.FADE_OUT_DURATION))
+            else:
+                pygame.mixer.music.stop()
+                BGM.__current = None
+                BGM.__state = BGM.STATE_WAITING
+
+        if BGM.__state == BGM.STATE_WAITING and BGM.__next is not None:
+            BGM.start(*BGM.__next)
+            BGM.__next = None
+
+        if BGM.__state == BGM.STATE_FADING_IN:
+            BGM.__fade += dt
+            if BGM.__fade < BGM.FADE_IN_DURATION:
+                pygame.mixer.music.set_volume(BGM.getVolume() * BGM.__fade / BGM.FADE_IN_DURATION)
+            else:
+                pygame.mixer.music.set_volume(BGM.getVolume())
+                BGM.__state = BGM.STATE_IDLE
+
+    @staticmethod
+    def start(musicName : str, data):
+        BGM.__state = BGM.STATE_IDLE
+
+        if isinstance(data, str):
+            print("Unable to play BGM (" + data + ")")
+            return
+
+        try:
+            pygame.mixer.music.load(data, musicName + ".mp3")
+            pygame.mixer.music.set_volume(0)
+            pygame.mixer.music.play()
+        except pygame.error as e:
+            print("Unable to play BGM (" + str(e) + ")")
+            return
+
+        BGM.__current = musicName
+        BGM.__state = BGM.STATE_FADING_IN
+        BGM.__fade = 0
+
+    @staticmethod
+    def getCurrent() -> str:
+        return BGM.__current
@@ -1,36 +1,133 @@
 import glob
 import os
+from typing import List
+
 import pygame
 
+from engine.assetloader import AssetLoader
+
 
 class SFX:
 
-    __sfx = {}
+    CHANNELS = 8  # mixer channels shared by all the SFXs
+
+    DEFAULT_MAX_VOICES = 2  # how many times a SFX can play at the same time
+    DEFAULT_PRIORITY = 0  # SFXs can only steal the channels of SFXs of lower or equal priority
+
+    # SFX name -> (max voices, priority), for the SFXs not using the defaults
+    SETTINGS = {
+        "bump": (1, 0)
+    }
+
+    __paths = {}  # SFX name -> file path, for all the SFXs
+    __sfx = {}  # SFX name -> sound, for the decoded SFXs (None if it could not be decoded)
+    __voices = {}  # channel id -> [SFX name, priority, play number] of the SFX playing on it
+    __playsCount = 0  # number of SFXs played, to know which voice is the oldest
 
     @staticmethod
     def load():
-        # Load all SFXs
+        # Index all SFXs, they are only decoded when used or preloaded
         from data.constants import Constants
         size = len(Constants.SFX_PATH) + 1
         for f in glob.iglob(os.path.join(Constants.SFX_PATH, '**', '*.ogg'), recursive=True):
             sfxName = f[size:len(f) - 4]
-            try:
-                sound =  pygame.mixer.Sound(f)
-                sound.set_volume(Constants.MASTER_VOLUME * Constants.SFX_VOLUME)
-                SFX.__sfx[sfxName] = sound
-            except pygame.error as e:
-                print("Couldn't load SFX " + sfxName + " (" + str(e) + ")")
-                SFX.__sfx[sfxName] = None
+            SFX.__paths[sfxName] = f
+
+        if pygame.mixer.get_init() is not None:
+            pygame.mixer.set_num_channels(SFX.CHANNELS)
+
+    '''
+    Adds the SFXs that are not decoded yet to the given loader batch
+    '''
+    @staticmethod
+    def preload(names : List[str], loader : AssetLoader):
+        for sfxName in names:
+            if sfxName in SFX.__sfx:
+                continue
+
+            if sfxName not in SFX.__paths:
+                raise Exception("Unknown SFX " + sfxName)
+
+            loader.add("sfx." + sfxName, lambda path=SFX.__paths[sfxName]: SFX.decode(path), lambda sound, name=sfxName: SFX.addSound(name, sound))
+
+    '''
+    Decodes a SFX file, can be run by the asset loader workers
+    Returns the error message if the file could not be decoded
+    '''
+    @staticmethod
+    def decode(path : str):
+        try:
+            return pygame.mixer.Sound(path)
+        except pygame.error as e:
+            return str(e)
+
+    @staticmethod
+    def addSound(sfxName : str, sound):
+        from data.constants import Constants
+
+        if isinstance(sound, str):
+            print("Couldn't load SFX " + sfxName + " (" + sound + ")")
+            SFX.__sfx[sfxName] = None
+            return
+
+        sound.set_volume(Constants.MASTER_VOLUME * Constants.SFX_VOLUME)
+        SFX.__sfx[sfxName] = sound
+
+    @staticmethod
+    def getSound(sfxName : str) -> pygame.mixer.Sound:
+        if sfxName not in SFX.__sfx:
+            if sfxName not in SFX.__paths:
+                raise Exception("Unknown SFX " + sfxName)
+
+            SFX.addSound(sfxName, SFX.decode(SFX.__paths[sfxName]))
+
+        return SFX.__sfx[sfxName]
 
     @staticmethod
     def unload():
-        SFX.__sfx = None
+        SFX.__paths = {}
+        SFX.__sfx = {}
+        SFX.__voices = {}
+
+    @staticmethod
+    def play(sfxName : str):
+        sound = SFX.getSound(sfxName)
+        if sound is None:
+            return
+
+        maxVoices, priority = SFX.SETTINGS.get(sfxName, (SFX.DEFAULT_MAX_VOICES, SFX.DEFAULT_PRIORITY))
+
+        channel = SFX.findChannel(sfxName, maxVoices, priority)
+        if channel is None:
+            return
+
+        SFX.__playsCount += 1
+        SFX.__voices[channel] = [sfxName, priority, SFX.__playsCount]
+        pygame.mixer.Channel(channel).play(sound)
 
+    '''
+    Returns the id of the channel to play the given SFX on, None if it should not be played
+    '''
     @staticmethod
-    def play(sfx : str):
-        if sfx not in SFX.__sfx:
-            raise Exception("Unknown SFX " + sfx)
+    def findChannel(sfxName : str, maxVoices : int, priority : int) -> int:
+        # Forget the voices that finished
+        for channel in list(SFX.__voices):
+            if not pygame.mixer.Channel(channel).get_busy():
+                del SFX.__voices[channel]
+
+        # Too many voices of this SFX : the oldest one is restarted
+        voices = [channel for channel in SFX.__voices if SFX.__voices[channel][0] == sfxName]
+        if len(voices) >= maxVoices:
+            return min(voices, key=lambda channel: SFX.__voices[channel][2])
+
+        # Free channel
+        for channel in range(SFX.CHANNELS):
+            if channel not in SFX.__voices:
+                return channel
+
+        # Steal the oldest voice of the lowest priority
+        stolen = min(SFX.__voices, key=lambda channel: (SFX.__voices[channel][1], SFX.__voices[channel][2]))
+        if SFX.__voices[stolen][1] > priority:
+            return None
 
-        sfx = SFX.__sfx[sfx]
-        if sfx is not None:
-            sfx.play()
\ No newline at end of file
+        return stolen
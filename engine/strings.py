@@ -1,9 +1,11 @@
 import glob
 import json
 import os
-import random
+import string as stringlib
+from typing import List
 
 from data.savedatafields import SaveDataFields
+from engine.assetloader import AssetLoader
 from engine.savemanager import SaveManager
 
 
@@ -12,11 +14,20 @@ class StringsFormatter:
         self.__engine = engine
 
     def __format__(self, format_spec):
+        return self.getValue(format_spec)
+
+    def __getitem__(self, name):
+        return self.getValue(name)
+
+    '''
+    Returns the value of a named placeholder
+    '''
+    def getValue(self, name : str) -> str:
         value = None
-        if format_spec == "playerName":
+        if name == "playerName":
             value = SaveManager.getCurrentSaveValue(SaveDataFields.PLAYER_NAME)
         else:
-            raise Exception("Unknown format placeholder " + format_spec)
+            raise Exception("Unknown format placeholder " + name)
 
         if value is None:
             value = "n/a"
@@ -24,8 +35,118 @@ class StringsFormatter:
         return value
 
 
+class StringTemplate:
+    '''
+    A string parsed once into its parts :
+    literal text, positional fields filled with the arguments and named placeholders resolved by the StringsFormatter
+    '''
+
+    PART_LITERAL = 0
+    PART_ARGUMENT = 1  # the field is an argument (index, conversion, format spec)
+    PART_ARGUMENT_FIELD = 2  # the field is an attribute or item of an argument, formatted by str.format (index, format string)
+    PART_PLACEHOLDER = 3  # the field is a named placeholder (name, conversion, format spec)
+
+    CONVERSIONS = {
+        None: None,
+        "s": str,
+        "r": repr,
+        "a": ascii
+    }
+
+    __parser = stringlib.Formatter()
+
+    def __init__(self, stringName : str, template : str):
+        self.__template = template
+        self.__parts = []  # (part type, ...)
+        self.__dynamic = False  # does the string have any field ?
+        self.__fallback = False  # strings with nested fields in their format specs are formatted by string.Formatter
+
+        autoIndex = 0
+        numbering = None  # "auto" or "manual", they cannot be mixed
+
+        for literal, fieldName, formatSpec, conversion in StringTemplate.__parser.parse(template):
+            if len(literal) > 0:
+                self.__parts.append((StringTemplate.PART_LITERAL, literal))
+
+            if fieldName is None:
+                continue
+
+            self.__dynamic = True
+
+            if "{" in formatSpec:
+                self.__fallback = True
+                return
+
+            if conversion not in StringTemplate.CONVERSIONS:
+                raise Exception("Unknown conversion !" + conversion + " in string " + stringName)
+
+            # Split the field name into the argument and its attributes / items
+            first = fieldName
+            for i, c in enumerate(fieldName):
+                if c in ".[":
+                    first = fieldName[:i]
+                    break
+            rest = fieldName[len(first):]
+
+            if first == "" or first.isdigit():
+                fieldNumbering = "auto" if first == "" else "manual"
+                if numbering is not None and numbering != fieldNumbering:
+                    raise Exception("Automatic and manual field numbering cannot be mixed in string " + stringName)
+                numbering = fieldNumbering
+
+                if first == "":
+                    index = autoIndex
+                    autoIndex += 1
+                else:
+                    index = int(first)
+
+                if rest == "":
+                    self.__parts.append((StringTemplate.PART_ARGUMENT, index, StringTemplate.CONVERSIONS[conversion], formatSpec))
+                else:
+                    fieldFormat = "{0" + rest + ("!" + conversion if conversion is not None else "") + ":" + formatSpec + "}"
+                    self.__parts.append((StringTemplate.PART_ARGUMENT_FIELD, index, fieldFormat))
+            else:
+                if rest != "":
+                    raise Exception("Named placeholders cannot have attributes or items in string " + stringName)
+
+                self.__parts.append((StringTemplate.PART_PLACEHOLDER, first, StringTemplate.CONVERSIONS[conversion], formatSpec))
+
+    '''
+    Is the result the same whatever the arguments and the save data ?
+    '''
+    def isStatic(self) -> bool:
+        return not self.__dynamic
+
+    def format(self, formatter : StringsFormatter, args) -> str:
+        if self.__fallback:
+            return StringTemplate.__parser.vformat(self.__template, args, formatter)
+
+        result = []
+        for part in self.__parts:
+            partType = part[0]
+
+            if partType == StringTemplate.PART_LITERAL:
+                result.append(part[1])
+            elif partType == StringTemplate.PART_ARGUMENT_FIELD:
+                result.append(part[2].format(args[part[1]]))
+            else:
+                if partType == StringTemplate.PART_ARGUMENT:
+                    value = args[part[1]]
+                else:
+                    value = formatter.getValue(part[1])
+
+                if part[2] is not None:
+                    value = part[2](value)
+
+                result.append(format(value, part[3]))
+
+        return "".join(result)
+
+
 class Strings:
-    __strings = {}
+    __namespaces = {}  # namespace -> path of its strings file, for the namespaces that are not loaded yet
+    __templates = {}  # string name -> StringTemplate, for the loaded namespaces
+    __cache = {}  # string name -> result, for the strings without fields (their result does not depend on the arguments)
     __formatter = None
     __engine = None
 
@@ -33,34 +154,78 @@ class Strings:
     def load(engine):
         Strings.__engine = engine
 
-        # Load the strings
+        # Index the strings files, each one is a namespace loaded the first time one of its strings is used
         from data.constants import Constants
         size = len(Constants.STRINGS_PATH) + 1
         for f in glob.iglob(os.path.join(Constants.STRINGS_PATH, '**', '*.json'), recursive=True):
             stringsName = f[size:len(f) - 4]
             stringsName = stringsName.replace(os.path.sep, ".")
 
-            with open(f, "r", encoding='utf-8') as file:
-                strings = json.loads(file.read())
-
-                for string in strings:
-                    Strings.__strings[stringsName + string] = strings[string]
+            Strings.__namespaces[stringsName] = f
 
         # Prepare the formatter
         Strings.__formatter = StringsFormatter(engine)
 
+    '''
+    Adds the namespaces that are not loaded yet to the given loader batch
+    Namespaces are named after their file ("base", "maps.test"...), unknown namespaces are ignored
+    '''
+    @staticmethod
+    def preload(namespaces : List[str], loader : AssetLoader):
+        for namespace in namespaces:
+            stringsName = namespace + "."
+            if stringsName in Strings.__namespaces:
+                loader.addJson("strings." + namespace, Strings.__namespaces[stringsName], lambda strings, name=stringsName: Strings.addStrings(name, strings))
+
+    @staticmethod
+    def addStrings(stringsName : str, strings : dict):
+        if stringsName not in Strings.__namespaces:
+            return  # already loaded
+
+        del Strings.__namespaces[stringsName]
+
+        for string in strings:
+            Strings.__templates[stringsName + string] = StringTemplate(stringsName + string, strings[string])
+
+    '''
+    Loads the namespace of the given string if it is not loaded yet
+    '''
+    @staticmethod
+    def loadNamespace(string : str):
+        for i, c in enumerate(string):
+            if c == "." and string[:i + 1] in Strings.__namespaces:
+                stringsName = string[:i + 1]
+                with open(Strings.__namespaces[stringsName], "r", encoding="utf-8") as f:
+                    Strings.addStrings(stringsName, json.loads(f.read()))
+                return
+
     @staticmethod
     def getString(string, *args):
-        if string not in Strings.__strings:
-            raise Exception("Unknown string " + string)
+        if string in Strings.__cache:
+            return Strings.__cache[string]
+
+        template = Strings.__templates.get(string)
+
+        if template is None:
+            Strings.loadNamespace(string)
+            template = Strings.__templates.get(string)
+
+            if template is None:
+                raise Exception("Unknown string " + string)
+
+        result = template.format(Strings.__formatter, args)
 
-        result = Strings.__strings[string].format(*args)
+        # the strings without fields are formatted once
+        if template.isStatic():
+            Strings.__cache[string] = result
 
         return result
 
 
     @staticmethod
     def unload():
-        Strings.__strings = {}
+        Strings.__namespaces = {}
+        Strings.__templates = {}
+        Strings.__cache = {}
         Strings.__formatter = None
-        Strings.__engine = None
\ No newline at end of file
+        Strings.__engine = None
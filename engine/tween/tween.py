@@ -29,7 +29,7 @@ class Tween:
         self.runningSince += dt
 
         if self.subject is not None:
-            self.subject.value = (
+            self.subject.tweenTo(
                 self.easing(
                     self.runningSince,
                     self.initialValue,
@@ -40,7 +40,7 @@ class Tween:
 
         if self.runningSince >= self.duration:
             if self.subject is not None:
-                self.subject.value = (
+                self.subject.tweenTo(
                     self.targetValue
                 )
             self.alive = False
@@ -1,3 +1,34 @@
 class TweenSubject:
+
+    currentTick = 0  # the current simulation tick, incremented by the engine before each update
+    interpolation = 1.0  # where the frame being drawn stands between the previous tick and the current one (0 to 1)
+
     def __init__(self, v : float):
-        self.value = v
\ No newline at end of file
+        self.__value = v
+        self.__previousValue = v  # the value at the end of the previous tick
+        self.__tick = -1  # the tick during which the value has been tweened
+
+    @property
+    def value(self) -> float:
+        return self.__value
+
+    @value.setter
+    def value(self, v : float):
+        # direct assignments are not interpolated
+        self.__value = v
+        self.__previousValue = v
+        self.__tick = -1
+
+    def tweenTo(self, v : float):
+        if self.__tick != TweenSubject.currentTick:
+            self.__previousValue = self.__value
+            self.__tick = TweenSubject.currentTick
+
+        self.__value = v
+
+    def getRenderValue(self) -> float:
+        # only interpolate if the value has been tweened during the current tick
+        if self.__tick != TweenSubject.currentTick:
+            return self.__value
+
+        return self.__previousValue + (self.__value - self.__previousValue) * TweenSubject.interpolation
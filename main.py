@@ -1,18 +1,26 @@
-import sys
+import argparse
 
 from engine.graphics.textures import *
+from engine.input import Input
 from engine.scene.map.mapscene import MapScene
 
 VARIANT = Constants.GAME_VARIANT_FLAMIFLETTE
 
 if __name__ == '__main__':
 
-    if len(sys.argv) >= 2:
-        configuration = sys.argv[1]
-    else:
-        configuration = Constants.DEFAULT_CONFIGURATION
+    parser = argparse.ArgumentParser()
+    parser.add_argument("configuration", nargs="?", default=Constants.DEFAULT_CONFIGURATION, help="engine configuration")
+    parser.add_argument("--record", help="file to record the inputs to")
+    parser.add_argument("--seed", type=int, help="RNG seed of the recording (random if not set)")
+    parser.add_argument("--replay", help="recorded inputs file to replay")
+    args = parser.parse_args()
 
-    engine = Engine(configuration, VARIANT)
+    if args.record is not None:
+        Input.startRecording(args.record, args.seed)
+    elif args.replay is not None:
+        Input.startReplay(args.replay)
+
+    engine = Engine(args.configuration, VARIANT)
 
     scene1 = MapScene(engine, "test", (10, 10))
     #scene1 = MapScene(engine, "test_tiny", (4, 4))
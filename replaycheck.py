@@ -0,0 +1,122 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict
+
+import pygame
+
+from data.constants import Constants
+from engine.engine import Engine
+from engine.input import Input
+from engine.tween.tweensubject import TweenSubject
+
+# Held keys of the recorded session : walk around, each direction for the given number of updates
+WALK_SCANCODES = [pygame.KSCAN_RIGHT, pygame.KSCAN_DOWN, pygame.KSCAN_LEFT, pygame.KSCAN_UP]
+WALK_STEP_FRAMES = 37
+
+SECOND_PUSH_FRAME = 150  # update at which a second map is pushed with a loading transition
+
+
+'''
+Runs a headless session pushing the map with a LoadingScene, recording or replaying its inputs
+Returns the final state of the session
+'''
+def session(mapName : str, spawnPosition : tuple, framesCount : int, configuration : str, record : str = None, replay : str = None) -> Dict:
+    Engine.SHOW_PERF_HUD = False
+
+    if record is not None:
+        # the dummy video driver has no keyboard : the held keys are simulated while recording
+        frame = 0
+
+        def getPressed():
+            keys = [False] * 512
+            keys[WALK_SCANCODES[(frame // WALK_STEP_FRAMES) % len(WALK_SCANCODES)]] = True
+            return pygame.key.ScancodeWrapper(keys)
+
+        pygame.key.get_pressed = getPressed
+        Input.startRecording(record, 0)
+    else:
+        Input.startReplay(replay)
+        framesCount = Input.getReplayLength()
+
+    engine = Engine(configuration, Constants.GAME_VARIANT_FLAMIFLETTE, True)
+
+    from engine.scene.map.mapscene import MapScene
+    from engine.scene.loadingscene import LoadingScene
+
+    scenes = [MapScene(engine, mapName, spawnPosition), MapScene(engine, mapName, spawnPosition)]
+    engine.pushScene(scenes[0], LoadingScene(engine))
+
+    TweenSubject.interpolation = 1.0
+
+    for frame in range(framesCount):
+        if frame == SECOND_PUSH_FRAME:
+            engine.pushScene(scenes[1], LoadingScene(engine))
+
+        # an irregular dt, as measured by a real main loop
+        engine.update(1000 / 60 + frame % 3, [])
+        engine.updateLoading()
+        engine.present(1000 / 60)
+
+    Input.stopRecording()
+
+    engine.getWindow().fill((0, 0, 0))
+    engine.draw()
+
+    results = {
+        "updates": framesCount,
+        "characters": [list(scene.getCharacterPosition()) for scene in scenes],
+        "tick": TweenSubject.currentTick,
+        "frame": hashlib.sha1(pygame.image.tostring(engine.getWindow(), "RGB")).hexdigest()
+    }
+
+    pygame.quit()
+
+    return results
+
+
+'''
+Records a session then replays it with a much smaller loading budget, as on a slower machine
+Each run is a separate process so that they both start from a fresh engine
+'''
+def check(mapName : str, spawnPosition : tuple, framesCount : int, configuration : str) -> bool:
+    with tempfile.TemporaryDirectory() as directory:
+        recording = os.path.join(directory, "session.rec")
+
+        runs = []
+        for mode, loadingBudget in (("--record", Engine.LOADING_BUDGET), ("--replay", 0.01)):
+            arguments = [sys.executable, __file__, mapName, "--spawn", *map(str, spawnPosition), "--frames", str(framesCount),
+                         "--configuration", configuration, "--loading-budget", str(loadingBudget), mode, recording]
+            output = subprocess.run(arguments, check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(output.splitlines()[-1]))
+
+    print("Recorded : " + json.dumps(runs[0]))
+    print("Replayed : " + json.dumps(runs[1]))
+
+    return runs[0] == runs[1]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Checks that a recorded session pushing maps with a loading transition replays to the same state")
+    parser.add_argument("map", help="name of the map to load")
+    parser.add_argument("--spawn", type=int, nargs=2, default=(10, 10), help="spawn position of the character in tiles")
+    parser.add_argument("--frames", type=int, default=300, help="number of updates to record")
+    parser.add_argument("--configuration", default=Constants.DEFAULT_CONFIGURATION, help="engine configuration")
+    parser.add_argument("--loading-budget", type=float, default=Engine.LOADING_BUDGET, help="loading budget of each frame in ms")
+    parser.add_argument("--record", help="only record a session to the given file and print its final state")
+    parser.add_argument("--replay", help="only replay the given recording and print its final state")
+    args = parser.parse_args()
+
+    Engine.LOADING_BUDGET = args.loading_budget
+
+    if args.record is not None or args.replay is not None:
+        print(json.dumps(session(args.map, tuple(args.spawn), args.frames, args.configuration, args.record, args.replay)))
+    elif check(args.map, tuple(args.spawn), args.frames, args.configuration):
+        print("Replay matches the recording")
+    else:
+        print("Replay differs from the recording")
+        sys.exit(1)